@@ -5,6 +5,9 @@ import mimetypes
 import google.generativeai as genai
 from openai import OpenAI
 
+# Largest file Gemini takes inline in the request; bigger ones are uploaded first
+GEMINI_INLINE_LIMIT = 15 * 1024 * 1024
+
 class InvoiceAgent:
     def __init__(self, provider: str = "openai"):
         self.provider = provider.lower()
@@ -30,6 +33,13 @@ class InvoiceAgent:
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode('utf-8')
 
+    def _gemini_document(self, file_path, mime_type):
+        """Document part for generate_content: inline bytes, skipping the upload round-trip when small enough."""
+        if os.path.getsize(file_path) > GEMINI_INLINE_LIMIT:
+            return genai.upload_file(file_path, mime_type=mime_type)
+        with open(file_path, "rb") as f:
+            return {"mime_type": mime_type, "data": f.read()}
+
     def extract_data(self, file_path: str) -> dict:
         mime_type, _ = mimetypes.guess_type(file_path)
         if not mime_type:
@@ -45,6 +55,7 @@ class InvoiceAgent:
         4. ID Number (Passport No, License No, etc.)
         5. Document Type (e.g., PASSPORT, DRIVING_LICENSE, ID_CARD)
         6. Expiry Date (YYYY-MM-DD format) - if available
+        7. Confidence (0.0-1.0) - how sure you are that every value is read correctly
 
         Return strict JSON. No markdown.
         Structure:
@@ -54,14 +65,15 @@ class InvoiceAgent:
             "dob": "...",
             "id_number": "...",
             "document_type": "...",
-            "expiry_date": "..."
+            "expiry_date": "...",
+            "confidence": 0.0
         }
         """
 
         try:
             if self.provider == "gemini":
-                uploaded_file = genai.upload_file(file_path, mime_type=mime_type)
-                response = self.model.generate_content([prompt_text, uploaded_file])
+                document = self._gemini_document(file_path, mime_type)
+                response = self.model.generate_content([prompt_text, document])
                 text = response.text
                 
             elif self.provider == "openai":
@@ -1,6 +1,7 @@
 import os
 import json
 import shutil
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from PIL import Image
 
@@ -14,6 +15,12 @@ class AuditLogger:
         self.audit_trail = []
         self.step_counter = 0
         
+        # Document copies/thumbnails are written by one background worker so
+        # log_step never blocks the caller (or an event loop) on file I/O;
+        # save_audit_report waits for them before writing the report
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit-io")
+        self._pending = []
+        
     def log_step(self, step_name, details, document_path=None, extracted_data=None, verification_result=None):
         """
         Logs a single step in the verification process.
@@ -30,29 +37,47 @@ class AuditLogger:
             "verification_result": verification_result
         }
         
-        # Copy document screenshot to audit folder
+        # Copy document screenshot to audit folder (in the background)
         if document_path and os.path.exists(document_path):
             screenshot_name = f"step_{self.step_counter:03d}_{os.path.basename(document_path)}"
-            screenshot_path = os.path.join(self.session_dir, screenshot_name)
-            shutil.copy2(document_path, screenshot_path)
             step_data["screenshot"] = screenshot_name
-            
-            # Create thumbnail for quick review
-            try:
-                img = Image.open(document_path)
-                img.thumbnail((300, 300))
-                thumb_name = f"thumb_{screenshot_name}"
-                img.save(os.path.join(self.session_dir, thumb_name))
-                step_data["thumbnail"] = thumb_name
-            except:
-                pass
+            self._pending.append(self._io.submit(self._save_document, step_data, document_path, screenshot_name))
         
         self.audit_trail.append(step_data)
         
+    def _save_document(self, step_data, document_path, screenshot_name):
+        """
+        Copies the document into the session folder, plus a thumbnail for quick review.
+        """
+        try:
+            shutil.copy2(document_path, os.path.join(self.session_dir, screenshot_name))
+        except OSError:
+            step_data.pop("screenshot", None)
+            return
+        
+        # Create thumbnail for quick review
+        try:
+            img = Image.open(document_path)
+            img.thumbnail((300, 300))
+            thumb_name = f"thumb_{screenshot_name}"
+            img.save(os.path.join(self.session_dir, thumb_name))
+            step_data["thumbnail"] = thumb_name
+        except:
+            pass
+        
+    def flush(self):
+        """
+        Waits for every queued document copy/thumbnail to be written.
+        """
+        wait(self._pending)
+        self._pending = []
+        
     def save_audit_report(self):
         """
         Saves the complete audit trail to a JSON file.
         """
+        self.flush()
+        
         report_path = os.path.join(self.session_dir, "audit_report.json")
         
         summary = {
@@ -83,7 +83,7 @@ async def process_case_workflow(
     
     try:
         workflow = ACIPWorkflow()
-        result = workflow.start_case(
+        result = await workflow.astart_case(
             case_id=case_id,
             customer_name=customer_name,
             document_path=document_path,
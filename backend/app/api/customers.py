@@ -6,6 +6,12 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # optional; falls back to stdlib json
+    _json_loads = json.loads
+
 router = APIRouter(prefix="/api/customers", tags=["customers"])
 
 # Path to customer database
@@ -36,8 +42,8 @@ def load_customers() -> List[dict]:
     
     for path in paths_to_try:
         if os.path.exists(path):
-            with open(path, 'r') as f:
-                return json.load(f)
+            with open(path, 'rb') as f:
+                return _json_loads(f.read())
     
     return []
 
@@ -1,19 +1,43 @@
 """Database configuration and session management."""
 
+import json
+from datetime import datetime
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from sqlalchemy import create_engine, event
 from app.config import get_settings
 
+try:
+    import orjson
+except ImportError:  # optional; falls back to stdlib json
+    orjson = None
+
 settings = get_settings()
 
 # Check if using SQLite
 is_sqlite = "sqlite" in settings.database_url
 
+
+def _json_default(value):
+    """Serialize values stdlib json can't handle (e.g. audit-entry datetimes)."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_serializer(value) -> str:
+    """JSON serializer for JSON columns."""
+    if orjson is not None:
+        # orjson writes naive datetimes in isoformat itself; default covers the rest
+        return orjson.dumps(value, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value, default=_json_default)
+
+
 # Async engine for FastAPI
 engine_kwargs = {
     "echo": settings.debug,
-    "future": True
+    "future": True,
+    "json_serializer": json_serializer
 }
 
 # SQLite needs special handling
@@ -26,7 +50,7 @@ async_engine = create_async_engine(
 )
 
 # Sync engine for Alembic migrations
-sync_kwargs = {"echo": settings.debug}
+sync_kwargs = {"echo": settings.debug, "json_serializer": json_serializer}
 if is_sqlite:
     sync_kwargs["connect_args"] = {"check_same_thread": False}
 
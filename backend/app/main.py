@@ -9,13 +9,24 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
+import asyncio
+import logging
 
 from app.config import get_settings
 from app.database import init_db
 from app.api import cases_router, actions_router, websocket_router, customers_router
+from app.services.agents import activity_logger
 
 settings = get_settings()
 
+# Route the app's own loggers (app.*) to the console at INFO
+app_logger = logging.getLogger("app")
+if not app_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+    app_logger.addHandler(_handler)
+app_logger.setLevel(logging.DEBUG if settings.debug else logging.INFO)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -33,6 +44,10 @@ async def lifespan(app: FastAPI):
     print(f"Documents directory: {settings.documents_dir}")
     print(f"Audit logs directory: {settings.audit_logs_dir}")
     
+    # Activity broadcasts (WebSocket) run on the app's event loop, including
+    # those logged from worker threads or sync workflow runs
+    activity_logger.set_broadcast_loop(asyncio.get_running_loop())
+    
     yield
     
     # Shutdown
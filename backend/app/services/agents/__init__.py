@@ -11,12 +11,19 @@ to perform AUSTRAC-compliant customer identification:
 
 from .activity_logger import ActivityLogger, activity_logger, AgentType, ActivityStatus
 from .document_inspector import DocumentInspectorAgent
-from .external_verifier import ExternalVerifierAgent
+from .external_verifier import (
+    ExternalVerifierAgent, SimulatedBackend, InstantBackend, DVSResult, PEPResult, SanctionsResult
+)
 from .compliance_officer import ComplianceOfficerAgent
 
 __all__ = [
     'DocumentInspectorAgent',
     'ExternalVerifierAgent', 
+    'SimulatedBackend',
+    'InstantBackend',
+    'DVSResult',
+    'PEPResult',
+    'SanctionsResult',
     'ComplianceOfficerAgent',
     'ActivityLogger',
     'activity_logger',
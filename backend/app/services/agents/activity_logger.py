@@ -6,12 +6,32 @@ which are then broadcast via WebSocket for live UI updates.
 """
 
 import asyncio
+import atexit
+import queue
+import sys
+import threading
+import time
 from datetime import datetime
 from typing import Optional, Callable, List, Dict, Any
 from dataclasses import dataclass, asdict
 from enum import Enum
 
 
+# Console/broadcast writes are batched: the writer thread collects entries for
+# up to FLUSH_INTERVAL seconds (or MAX_BATCH entries) and writes them together
+FLUSH_INTERVAL = 0.1
+MAX_BATCH = 100
+
+_STATUS_ICONS = {
+    "started": "▶️",
+    "in_progress": "⏳",
+    "success": "✅",
+    "warning": "⚠️",
+    "error": "❌",
+    "decision": "🎯"
+}
+
+
 class AgentType(str, Enum):
     DOCUMENT_INSPECTOR = "document_inspector"
     EXTERNAL_VERIFIER = "external_verifier"
@@ -49,16 +69,32 @@ class ActivityLogger:
     """
     Centralized activity logger that collects agent activities
     and broadcasts them for real-time UI updates.
+    
+    log() only records the entry in memory and queues it; a daemon thread
+    prints and broadcasts queued entries in batches, in log order.
     """
     
     def __init__(self):
         self._activities: Dict[str, List[ActivityEntry]] = {}
         self._broadcast_callback: Optional[Callable] = None
-        self._start_times: Dict[str, datetime] = {}
+        self._start_times: Dict[str, float] = {}
+        self._queue: "queue.Queue[ActivityEntry]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        # Event loop the broadcast callback runs on (the app's loop); set once
+        # by the broadcast owner, never by log() - short-lived loops such as
+        # asyncio.run() in sync workflow wrappers must not replace it
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
     
-    def set_broadcast_callback(self, callback: Callable):
-        """Set the async callback for broadcasting activities"""
+    def set_broadcast_callback(self, callback: Callable, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Set the async callback for broadcasting activities (and, if known, the loop it runs on)"""
         self._broadcast_callback = callback
+        if loop is not None:
+            self.set_broadcast_loop(loop)
+    
+    def set_broadcast_loop(self, loop: asyncio.AbstractEventLoop):
+        """Set the event loop broadcasts are scheduled on; call from the broadcast owner's loop (app startup)"""
+        self._loop = loop
     
     def _get_agent_display_name(self, agent: AgentType) -> str:
         names = {
@@ -84,12 +120,11 @@ class ActivityLogger:
         duration_ms = None
         action_key = f"{case_id}:{agent}:{action}"
         if status in [ActivityStatus.SUCCESS, ActivityStatus.ERROR, ActivityStatus.WARNING]:
-            if action_key in self._start_times:
-                delta = datetime.utcnow() - self._start_times[action_key]
-                duration_ms = int(delta.total_seconds() * 1000)
-                del self._start_times[action_key]
+            started = self._start_times.pop(action_key, None)
+            if started is not None:
+                duration_ms = int((time.monotonic() - started) * 1000)
         elif status == ActivityStatus.STARTED:
-            self._start_times[action_key] = datetime.utcnow()
+            self._start_times[action_key] = time.monotonic()
         
         entry = ActivityEntry(
             timestamp=datetime.utcnow().isoformat(),
@@ -108,37 +143,73 @@ class ActivityLogger:
             self._activities[case_id] = []
         self._activities[case_id].append(entry)
         
+        # Console output and broadcast happen on the writer thread
+        self._ensure_writer()
+        self._queue.put(entry)
+        
+        return entry
+    
+    def flush(self):
+        """Block until every queued entry has been printed and handed to the broadcaster"""
+        self._queue.join()
+    
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._drain, name="activity-logger", daemon=True)
+                self._writer.start()
+                # The writer is a daemon thread: write out what is still queued at exit
+                atexit.register(self.flush)
+    
+    def _drain(self):
+        """Writer thread: collect a batch of entries, then write them in one go"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < MAX_BATCH:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception:
+                pass  # Logging must never take the writer thread down
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    def _write_batch(self, batch: List[ActivityEntry]):
         # Print to console for visibility
-        status_icons = {
-            "started": "▶️",
-            "in_progress": "⏳",
-            "success": "✅",
-            "warning": "⚠️",
-            "error": "❌",
-            "decision": "🎯"
-        }
-        icon = status_icons.get(status.value, "•")
-        duration_str = f" ({duration_ms}ms)" if duration_ms else ""
-        print(f"[{entry.agent_display_name}] {icon} {action}: {details}{duration_str}")
+        lines = []
+        for entry in batch:
+            icon = _STATUS_ICONS.get(entry.status, "•")
+            duration_str = f" ({entry.duration_ms}ms)" if entry.duration_ms else ""
+            lines.append(f"[{entry.agent_display_name}] {icon} {entry.action}: {entry.details}{duration_str}\n")
+        sys.stdout.write("".join(lines))
+        sys.stdout.flush()
         
         # Broadcast via callback if set
-        if self._broadcast_callback:
+        loop = self._loop
+        if self._broadcast_callback and loop is not None and not loop.is_closed():
             try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    asyncio.create_task(self._broadcast(entry))
+                asyncio.run_coroutine_threadsafe(self._broadcast(batch), loop)
             except RuntimeError:
-                pass  # No event loop, skip broadcast
-        
-        return entry
+                pass  # Loop shut down, skip broadcast
     
-    async def _broadcast(self, entry: ActivityEntry):
-        """Broadcast activity to WebSocket clients"""
+    async def _broadcast(self, batch: List[ActivityEntry]):
+        """Broadcast activities to WebSocket clients"""
         if self._broadcast_callback:
-            await self._broadcast_callback({
-                "type": "agent_activity",
-                **entry.to_dict()
-            })
+            for entry in batch:
+                await self._broadcast_callback({
+                    "type": "agent_activity",
+                    **entry.to_dict()
+                })
     
     def get_activities(self, case_id: str) -> List[ActivityEntry]:
         """Get all activities for a case"""
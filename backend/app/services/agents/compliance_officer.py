@@ -8,12 +8,42 @@ Responsible for:
 - Applying bank's Risk Appetite Statement rules
 """
 
+import sys
 import json
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from .activity_logger import activity_logger, AgentType, ActivityStatus
 
 
+# Static risk / mitigating factor messages, shared by every assessed case
+_RF_EXTRACTION_FAILED = sys.intern("Document extraction failed")
+_RF_DVS_FAILED = sys.intern("DVS verification failed")
+_RF_SANCTIONS_HIT = sys.intern("SANCTIONS HIT")
+_MF_EXTRACTED = sys.intern("Document successfully extracted")
+_MF_FIELDS_VALIDATED = sys.intern("All document fields validated")
+_MF_DB_MATCH = sys.intern("Customer database match confirmed")
+_MF_NO_PEP = sys.intern("No PEP associations found")
+_MF_SANCTIONS_CLEAR = sys.intern("Cleared all sanctions lists")
+
+# Factors that automatically set HIGH risk
+_CRITICAL_KEYWORDS = ("SANCTIONS", "PEP status", _RF_DVS_FAILED)
+
+# Activity-log prefix per decision
+_DECISION_EMOJI = {
+    "APPROVE": "✅",
+    "REJECT": "❌",
+    "ESCALATE": "⚠️"
+}
+
+# Whole-percent labels, indexed instead of running the format machinery per case
+_PCT_STR = tuple(f"{i}%" for i in range(101))
+
+
+def _fmt_pct(value: float) -> str:
+    """Format a 0-1 score as a whole percentage, e.g. 0.93 -> '93%'."""
+    return _PCT_STR[min(100, max(0, int(round(value * 100))))]
+
+
 class ComplianceOfficerAgent:
     """
     AI Agent for compliance decision-making.
@@ -35,6 +65,11 @@ class ComplianceOfficerAgent:
             "sanctions_auto_reject": True,
             "dvs_required": True
         }
+        
+        # Rules are static for the agent's lifetime, so resolve the flags
+        # _make_decision branches on once instead of on every case
+        self._sanctions_rejects = bool(self.risk_rules["sanctions_auto_reject"])
+        self._pep_escalates = bool(self.risk_rules["pep_requires_edd"])
     
     def assess(
         self, 
@@ -95,31 +130,16 @@ class ComplianceOfficerAgent:
         )
         
         # Step 5: Generate Final Audit Entry
-        final_audit = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "step": "ACIP_DETERMINATION",
-            "agent": "Compliance Officer",
-            "decision": decision_result["decision"],
-            "risk_level": risk_level,
-            "confidence_score": decision_result["confidence_score"],
-            "reasoning": decision_result["reasoning"],
-            "risk_factors": risk_factors,
-            "mitigating_factors": mitigating_factors
-        }
-        audit_trail.append(final_audit)
+        result = self._build_assessment(
+            risk_level, risk_factors, mitigating_factors, decision_result, audit_trail
+        )
         
         # Log final decision
-        decision_emoji = {
-            "APPROVE": "✅",
-            "REJECT": "❌",
-            "ESCALATE": "⚠️"
-        }
-        
         activity_logger.log(
             case_id=case_id,
             agent=AgentType.COMPLIANCE_OFFICER,
             action="ACIP Decision",
-            details=f"{decision_emoji.get(decision_result['decision'], '•')} Decision: {decision_result['decision']} | Risk: {risk_level}",
+            details=f"{_DECISION_EMOJI.get(decision_result['decision'], '•')} Decision: {decision_result['decision']} | Risk: {risk_level}",
             status=ActivityStatus.DECISION,
             data={
                 "decision": decision_result["decision"],
@@ -128,6 +148,66 @@ class ComplianceOfficerAgent:
             }
         )
         
+        return result
+    
+    def assess_failed_inspection(self, case_id: str, inspection_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Assessment for a case whose document could not be inspected.
+        
+        With no extracted data there is no external evidence to weigh, so the
+        case is escalated for human review without running the rule set.
+        Returns the same shape as assess(), plus "reason": "inspection_failed".
+        """
+        doc_assessment = self._assess_document_evidence(case_id, inspection_result)
+        decision_result = {
+            "decision": "ESCALATE",
+            "confidence_score": 0.70,
+            "reasoning": "Document inspection failed - no extracted data to verify. Requires human review.",
+            "next_steps": "Escalated to Operations team for manual review. Request a new document if required.",
+            "restrictions": ["LIMITED_TRANSACTIONS"]
+        }
+        
+        result = self._build_assessment(
+            "HIGH", doc_assessment["risk_factors"], [], decision_result, [doc_assessment["audit_entry"]]
+        )
+        result["reason"] = "inspection_failed"
+        
+        activity_logger.log(
+            case_id=case_id,
+            agent=AgentType.COMPLIANCE_OFFICER,
+            action="ACIP Decision",
+            details=f"{_DECISION_EMOJI['ESCALATE']} Decision: ESCALATE | Risk: HIGH (document inspection failed)",
+            status=ActivityStatus.DECISION,
+            data={
+                "decision": "ESCALATE",
+                "risk_level": "HIGH",
+                "confidence": decision_result["confidence_score"]
+            }
+        )
+        
+        return result
+    
+    def _build_assessment(
+        self,
+        risk_level: str,
+        risk_factors: List[str],
+        mitigating_factors: List[str],
+        decision_result: Dict[str, Any],
+        audit_trail: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Append the final determination to the audit trail and build the result"""
+        audit_trail.append({
+            "timestamp": datetime.utcnow(),
+            "step": "ACIP_DETERMINATION",
+            "agent": "Compliance Officer",
+            "decision": decision_result["decision"],
+            "risk_level": risk_level,
+            "confidence_score": decision_result["confidence_score"],
+            "reasoning": decision_result["reasoning"],
+            "risk_factors": risk_factors,
+            "mitigating_factors": mitigating_factors
+        })
+        
         return {
             "decision": decision_result["decision"],
             "risk_level": risk_level,
@@ -146,25 +226,25 @@ class ComplianceOfficerAgent:
         mitigating_factors = []
         
         if not inspection_result.get("success"):
-            risk_factors.append("Document extraction failed")
+            risk_factors.append(_RF_EXTRACTION_FAILED)
         else:
-            mitigating_factors.append("Document successfully extracted")
+            mitigating_factors.append(_MF_EXTRACTED)
             
             quality = inspection_result.get("quality_score", 0)
             if quality >= 0.9:
-                mitigating_factors.append(f"High quality document ({quality:.0%})")
+                mitigating_factors.append(f"High quality document ({_fmt_pct(quality)})")
             elif quality < 0.7:
-                risk_factors.append(f"Low quality document ({quality:.0%})")
+                risk_factors.append(f"Low quality document ({_fmt_pct(quality)})")
             
             if inspection_result.get("issues"):
                 for issue in inspection_result["issues"]:
                     risk_factors.append(f"Validation issue: {issue}")
             else:
-                mitigating_factors.append("All document fields validated")
+                mitigating_factors.append(_MF_FIELDS_VALIDATED)
         
         return {
             "audit_entry": {
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": datetime.utcnow(),
                 "step": "DOCUMENT_REVIEW",
                 "agent": "Compliance Officer",
                 "result": "ACCEPTABLE" if inspection_result.get("success") else "CONCERNS",
@@ -186,14 +266,14 @@ class ComplianceOfficerAgent:
         # DVS Check
         dvs = verification_result.get("dvs_result", {})
         if dvs.get("verified"):
-            mitigating_factors.append(f"DVS verified (Match: {dvs.get('match_score', 0):.0%})")
+            mitigating_factors.append(f"DVS verified (Match: {_fmt_pct(dvs.get('match_score', 0))})")
         else:
-            risk_factors.append("DVS verification failed")
+            risk_factors.append(_RF_DVS_FAILED)
         
         # Database Match
         db_match = verification_result.get("database_match", {})
         if db_match.get("status") == "VERIFIED":
-            mitigating_factors.append("Customer database match confirmed")
+            mitigating_factors.append(_MF_DB_MATCH)
         elif db_match.get("discrepancies"):
             for disc in db_match["discrepancies"]:
                 risk_factors.append(f"Discrepancy in {disc['field']}")
@@ -203,20 +283,20 @@ class ComplianceOfficerAgent:
         if pep.get("is_pep"):
             risk_factors.append(f"PEP status: {pep.get('pep_category', 'Unknown')}")
         else:
-            mitigating_factors.append("No PEP associations found")
+            mitigating_factors.append(_MF_NO_PEP)
         
         # Sanctions Check
         sanctions = verification_result.get("sanctions_result", {})
         if sanctions.get("is_sanctioned"):
-            risk_factors.append("SANCTIONS HIT")
+            risk_factors.append(_RF_SANCTIONS_HIT)
         else:
-            mitigating_factors.append("Cleared all sanctions lists")
+            mitigating_factors.append(_MF_SANCTIONS_CLEAR)
         
         overall = verification_result.get("overall_status", "PENDING")
         
         return {
             "audit_entry": {
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": datetime.utcnow(),
                 "step": "EXTERNAL_VERIFICATION_REVIEW",
                 "agent": "Compliance Officer",
                 "result": overall,
@@ -235,9 +315,8 @@ class ComplianceOfficerAgent:
         """Calculate overall risk level"""
         
         # Critical risk factors that automatically set HIGH risk
-        critical_keywords = ["SANCTIONS", "PEP status", "DVS verification failed"]
         for factor in risk_factors:
-            for keyword in critical_keywords:
+            for keyword in _CRITICAL_KEYWORDS:
                 if keyword in factor:
                     return "HIGH"
         
@@ -264,7 +343,7 @@ class ComplianceOfficerAgent:
         
         # Check for automatic rejection conditions
         sanctions = verification_result.get("sanctions_result", {})
-        if sanctions.get("is_sanctioned") and self.risk_rules.get("sanctions_auto_reject"):
+        if self._sanctions_rejects and sanctions.get("is_sanctioned"):
             return {
                 "decision": "REJECT",
                 "confidence_score": 0.99,
@@ -275,7 +354,7 @@ class ComplianceOfficerAgent:
         
         # Check for automatic escalation conditions
         pep = verification_result.get("pep_result", {})
-        if pep.get("is_pep") and self.risk_rules.get("pep_requires_edd"):
+        if self._pep_escalates and pep.get("is_pep"):
             return {
                 "decision": "ESCALATE",
                 "confidence_score": 0.85,
@@ -351,7 +430,12 @@ class ComplianceOfficerAgent:
         ]
         
         for entry in assessment_result.get("audit_trail", []):
-            report_lines.append(f"[{entry['timestamp']}] {entry['step']}")
+            # Timestamps are kept as datetime objects and only formatted here;
+            # entries reloaded from the database are already ISO strings.
+            timestamp = entry['timestamp']
+            if isinstance(timestamp, datetime):
+                timestamp = timestamp.isoformat()
+            report_lines.append(f"[{timestamp}] {entry['step']}")
             report_lines.append(f"  Agent: {entry.get('agent', 'System')}")
             report_lines.append(f"  Result: {entry.get('result', 'N/A')}")
             report_lines.append("")
@@ -10,12 +10,321 @@ Responsible for:
 """
 
 import os
-import time
+import re
 import random
-from typing import Dict, Any, Optional, List
+import asyncio
+import time
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional, List, Sequence, Tuple
 from datetime import datetime
+import numpy as np
 from .activity_logger import activity_logger, AgentType, ActivityStatus
 
+try:
+    from numba import njit
+except ImportError:  # optional; the same kernel then runs as plain Python
+    njit = None
+
+# Sync verify() called from inside a running event loop (the workflow runs
+# synchronously from async routes) drives the checks on one of these threads
+_sync_runner = ThreadPoolExecutor(max_workers=4, thread_name_prefix="external-verifier")
+
+
+def _run_sync(coro):
+    """Drive a coroutine to completion from sync code, inside a running loop or not."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    return _sync_runner.submit(asyncio.run, coro).result()
+
+
+# Typos tolerated by _is_near_match
+MAX_TYPO_DISTANCE = 2
+
+# Common name abbreviations treated as the same name (Jon vs John, Bob vs Robert, etc.)
+_NAME_ALIASES = frozenset(frozenset(pair) for pair in (
+    ("JON", "JOHN"),
+    ("BOB", "ROBERT"),
+    ("BILL", "WILLIAM"),
+    ("MIKE", "MICHAEL"),
+    ("JIM", "JAMES")
+))
+
+# Separators ignored when comparing values ("AB-12 3.4" == "AB1234")
+_STRIP_SEPARATORS = str.maketrans("", "", "-. ")
+
+# (extracted field, fallback extracted field, database field, display name)
+_FIELD_MAPPINGS = (
+    ("first_name", None, "first_name", "First Name"),
+    ("last_name", None, "last_name", "Last Name"),
+    ("dob", None, "dob", "Date of Birth"),
+    ("document_number", "id_number", "id_number", "ID Number"),
+    ("id_number", None, "id_number", "ID Number")
+)
+
+# Display names whose discrepancies mark the name / DOB as not matching
+_NAME_FIELDS = frozenset(("First Name", "Last Name"))
+_DOB_FIELD = "Date of Birth"
+
+# Raw values treated as missing (extraction failed / not on record)
+_MISSING = frozenset((None, "", "null", "None"))
+
+# Simulated screening hits: upper-cased name contains any of these
+_PEP_KEYWORDS = frozenset(("POLITICIAN", "MINISTER"))
+_SANCTIONS_KEYWORDS = frozenset(("SANCTIONED",))
+
+
+def _keyword_screen(keywords: frozenset) -> "re.Pattern[str]":
+    """Compile keywords into one alternation so a name is scanned once, however long the list grows"""
+    return re.compile("|".join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True)))
+
+
+_PEP_SCREEN = _keyword_screen(_PEP_KEYWORDS)
+_SANCTIONS_SCREEN = _keyword_screen(_SANCTIONS_KEYWORDS)
+
+_STATUS_EMOJI = {
+    "VERIFIED": "✓",
+    "PARTIAL_MATCH": "⚠",
+    "NO_MATCH": "✗",
+    "FLAGGED": "🚨"
+}
+
+_PEP_SOURCES = ("World-Check", "Dow Jones", "Refinitiv")
+_SANCTIONS_LISTS = ("OFAC SDN", "UN Consolidated", "EU Sanctions")
+
+
+# Immutable per-check results. verify_async() turns them into plain dicts
+# (asdict) for the workflow state, the database and the dashboard.
+
+@dataclass(frozen=True, slots=True)
+class DVSResult:
+    verified: bool
+    match_score: float
+    checked_at: str
+    document_valid: Optional[bool] = None
+    document_expired: Optional[bool] = None
+    name_match: Optional[bool] = None
+    dob_match: Optional[bool] = None
+    error: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class PEPResult:
+    checked: bool
+    is_pep: bool
+    match_type: Optional[str]
+    pep_category: Optional[str]
+    sources: Tuple[str, ...]
+    checked_at: str
+
+
+@dataclass(frozen=True, slots=True)
+class SanctionsResult:
+    checked: bool
+    is_sanctioned: bool
+    lists_checked: Tuple[str, ...]
+    match_details: Optional[Dict[str, Any]]
+    checked_at: str
+
+
+SCREENING_CACHE_SIZE = 10_000
+
+
+class _ScreeningCache:
+    """
+    Thread-safe in-process LRU of DVS/PEP/sanctions results with a TTL.
+    
+    Keyed by the normalized identifiers a provider is queried with, so a
+    customer re-submitting within the TTL (retries, multi-document cases)
+    does not pay for the same external check twice. Results are immutable
+    records, so they are shared rather than copied.
+    """
+    
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple[Any, ...]) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            result, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+    
+    def set(self, key: Tuple[Any, ...], result: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (result, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared across agent instances (a new agent is created per workflow run)
+_dvs_cache = _ScreeningCache(SCREENING_CACHE_SIZE)
+_pep_cache = _ScreeningCache(SCREENING_CACHE_SIZE)
+_sanctions_cache = _ScreeningCache(SCREENING_CACHE_SIZE)
+
+
+def _levenshtein_kernel(s1: Sequence, s2: Sequence, max_distance: int) -> int:
+    """
+    Banded Levenshtein DP over two sequences of comparable items.
+    
+    Only cells within max_distance of the diagonal are computed (anything
+    further out is already too far), and the scan stops as soon as a whole
+    band row exceeds max_distance. Returns the exact distance when it is at
+    most max_distance, otherwise max_distance + 1.
+    """
+    n = len(s2)
+    too_far = max_distance + 1
+    if abs(len(s1) - n) > max_distance:
+        return too_far
+    
+    row = list(range(n + 1))
+    for i in range(1, len(s1) + 1):
+        lo = max(1, i - max_distance)
+        hi = min(n, i + max_distance)
+        diagonal = row[lo - 1]
+        row[lo - 1] = i if lo == 1 else too_far
+        best = row[lo - 1]
+        for j in range(lo, hi + 1):
+            above = row[j]
+            cost = 0 if s1[i - 1] == s2[j - 1] else 1
+            row[j] = min(above + 1, row[j - 1] + 1, diagonal + cost)
+            diagonal = above
+            best = min(best, row[j])
+        if hi < n:
+            row[hi + 1] = too_far  # outside the band for the next row
+        if best > max_distance:
+            return too_far
+    return min(row[n], too_far)
+
+
+if njit is not None:
+    _levenshtein_jit = njit(cache=True)(_levenshtein_kernel)
+    
+    def _levenshtein_distance(s1: str, s2: str, max_distance: int) -> int:
+        """Bounded Levenshtein distance, compiled by numba over UTF-32 code points"""
+        return int(_levenshtein_jit(
+            np.frombuffer(s1.encode("utf-32-le"), dtype=np.uint32),
+            np.frombuffer(s2.encode("utf-32-le"), dtype=np.uint32),
+            max_distance
+        ))
+else:
+    _levenshtein_distance = _levenshtein_kernel
+
+
+def _is_near_match(value1: str, value2: str) -> bool:
+    """Check if two values are near matches (handle common variations)"""
+    # Exact match (the common case for ID numbers) needs no normalization or cache lookup
+    if value1 == value2:
+        return True
+    
+    # The check is symmetric; order the pair so both directions share a cache entry
+    if value2 < value1:
+        value1, value2 = value2, value1
+    return _is_near_match_ordered(value1, value2)
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_near_match_ordered(value1: str, value2: str) -> bool:
+    """Memoized _is_near_match: the same names and IDs recur across cases"""
+    # Remove common variations
+    v1 = value1.translate(_STRIP_SEPARATORS)
+    v2 = value2.translate(_STRIP_SEPARATORS)
+    
+    if v1 == v2:
+        return True
+    
+    # Check for common name abbreviations
+    if frozenset((v1, v2)) in _NAME_ALIASES:
+        return True
+    
+    # Check Levenshtein distance for typos (up to 2 character differences);
+    # a bigger length gap rules it out without running the DP at all
+    if len(v1) > 3 and len(v2) > 3 and abs(len(v1) - len(v2)) <= MAX_TYPO_DISTANCE:
+        if _levenshtein_distance(v1, v2, MAX_TYPO_DISTANCE) <= MAX_TYPO_DISTANCE:
+            return True
+    
+    return False
+
+
+def _upper_name(extracted_data: Dict[str, Any]) -> str:
+    """Full name as sent to the providers"""
+    return f"{extracted_data.get('first_name', '')} {extracted_data.get('last_name', '')}".strip().upper()
+
+
+class SimulatedBackend:
+    """
+    Demo stand-in for the DVS, PEP and sanctions providers.
+    
+    Results come from simple keyword rules, with each call delayed by a
+    realistic provider round trip. A production backend exposes the same
+    coroutines and calls the real APIs.
+    """
+    
+    LATENCY = {"dvs": 0.5, "pep": 0.4, "sanctions": 0.5, "database": 0.3, "bulk_screening": 0.5}
+    
+    async def round_trip(self, service: str):
+        """Wait out one simulated call to `service`"""
+        await asyncio.sleep(self.LATENCY[service])
+    
+    async def dvs(self, doc_number: str, name_upper: str, dob: Optional[str], checked_at: str) -> DVSResult:
+        await self.round_trip("dvs")
+        return DVSResult(
+            verified=True,
+            match_score=0.98,
+            checked_at=checked_at,
+            document_valid=True,
+            document_expired=False,
+            name_match=True,
+            dob_match=True
+        )
+    
+    async def pep(self, name_upper: str, dob: Optional[str], checked_at: str) -> PEPResult:
+        await self.round_trip("pep")
+        is_pep = _PEP_SCREEN.search(name_upper) is not None
+        return PEPResult(
+            checked=True,
+            is_pep=is_pep,
+            match_type="exact" if is_pep else None,
+            pep_category="Government Official" if is_pep else None,
+            sources=_PEP_SOURCES,
+            checked_at=checked_at
+        )
+    
+    async def sanctions(self, name_upper: str, nationality: Optional[str], checked_at: str) -> SanctionsResult:
+        await self.round_trip("sanctions")
+        is_sanctioned = _SANCTIONS_SCREEN.search(name_upper) is not None
+        return SanctionsResult(
+            checked=True,
+            is_sanctioned=is_sanctioned,
+            lists_checked=_SANCTIONS_LISTS,
+            match_details={"list": "OFAC SDN", "match_score": 1.0} if is_sanctioned else None,
+            checked_at=checked_at
+        )
+
+
+class InstantBackend(SimulatedBackend):
+    """SimulatedBackend without the artificial latency (tests, benchmarks, non-demo runs)"""
+    
+    async def round_trip(self, service: str):
+        return
+
 
 class ExternalVerifierAgent:
     """
@@ -28,7 +337,17 @@ class ExternalVerifierAgent:
     4. Address verification services
     """
     
-    def __init__(self):
+    def __init__(self, backend: Optional[SimulatedBackend] = None):
+        """
+        Args:
+            backend: Provider backend for the external checks. Defaults to
+                SimulatedBackend when settings.simulate_latency is on,
+                otherwise InstantBackend.
+        """
+        from app.config import get_settings
+        self.settings = get_settings()
+        self.backend = backend or (SimulatedBackend() if self.settings.simulate_latency else InstantBackend())
+        
         # In production, these would be real API credentials
         self.dvs_enabled = True
         self.pep_enabled = True
@@ -38,6 +357,8 @@ class ExternalVerifierAgent:
         """
         Main verification method - runs all external checks.
         
+        Blocking wrapper around verify_async() for sync callers.
+        
         Returns:
             {
                 "success": bool,
@@ -50,6 +371,87 @@ class ExternalVerifierAgent:
                 "requires_human_review": bool
             }
         """
+        return _run_sync(self.verify_async(case_id, extracted_data, customer_db_data))
+    
+    def run_check(
+        self,
+        check: str,
+        case_id: str,
+        extracted_data: Dict[str, Any],
+        customer_db_data: Optional[Dict] = None,
+        checked_at: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a single external check and return its result as a plain dict.
+        
+        Lets the workflow fan the checks out as separate graph nodes;
+        summarize() folds the partial results back into the verify() shape.
+        Blocking wrapper around run_check_async().
+        
+        Args:
+            check: "dvs", "pep", "sanctions" or "database"
+        """
+        return _run_sync(self.run_check_async(check, case_id, extracted_data, customer_db_data, checked_at))
+    
+    async def run_check_async(
+        self,
+        check: str,
+        case_id: str,
+        extracted_data: Dict[str, Any],
+        customer_db_data: Optional[Dict] = None,
+        checked_at: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Async counterpart of run_check()"""
+        name_upper = _upper_name(extracted_data)
+        checked_at = checked_at or datetime.utcnow().isoformat()
+        
+        if check == "dvs":
+            result = await self._check_dvs(case_id, extracted_data, name_upper, checked_at)
+        elif check == "pep":
+            result = await self._check_pep(case_id, name_upper, extracted_data.get("dob"), checked_at)
+        elif check == "sanctions":
+            result = await self._check_sanctions(case_id, name_upper, extracted_data.get("nationality"), checked_at)
+        elif check == "database":
+            return await self._verify_against_database(case_id, extracted_data, customer_db_data or {})
+        else:
+            raise ValueError(f"Unknown external check: {check}")
+        
+        return asdict(result)
+    
+    def summarize(
+        self,
+        case_id: str,
+        check_results: Dict[str, Any],
+        extracted_data: Dict[str, Any],
+        customer_db_data: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """
+        Combine run_check() results into the same shape verify() returns.
+        
+        Args:
+            check_results: {"dvs_result": ..., "pep_result": ..., "sanctions_result": ...,
+                "database_match": ...} as produced by run_check()
+        """
+        results = {
+            "success": True,
+            "dvs_result": DVSResult(**check_results["dvs_result"]),
+            "pep_result": PEPResult(**check_results["pep_result"]),
+            "sanctions_result": SanctionsResult(**check_results["sanctions_result"]),
+            "database_match": check_results.get("database_match"),
+            "overall_status": "PENDING",
+            "risk_indicators": [],
+            "requires_human_review": False
+        }
+        return self._finalize(case_id, results, extracted_data, customer_db_data)
+    
+    async def verify_async(self, case_id: str, extracted_data: Dict[str, Any], customer_db_data: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Run all external checks concurrently.
+        
+        The DVS, PEP, sanctions and database checks are independent network
+        calls, so the case takes as long as the slowest one rather than the sum.
+        Returns the same shape as verify().
+        """
         # Log start - single message for all checks
         activity_logger.log(
             case_id=case_id,
@@ -70,74 +472,79 @@ class ExternalVerifierAgent:
             "requires_human_review": False
         }
         
-        name = f"{extracted_data.get('first_name', '')} {extracted_data.get('last_name', '')}".strip()
-        doc_number = extracted_data.get("document_number") or extracted_data.get("id_number")
-        
-        # Run all checks (silent logging)
-        results["dvs_result"] = self._check_dvs(case_id, extracted_data)
+        name_upper = _upper_name(extracted_data)
+        # The checks run concurrently, so they share one verification timestamp
+        checked_at = datetime.utcnow().isoformat()
         
+        # Run all checks concurrently (silent logging)
+        checks = [
+            self._check_dvs(case_id, extracted_data, name_upper, checked_at),
+            self._check_pep(case_id, name_upper, extracted_data.get("dob"), checked_at),
+            self._check_sanctions(case_id, name_upper, extracted_data.get("nationality"), checked_at)
+        ]
         if customer_db_data:
-            results["database_match"] = self._verify_against_database(case_id, extracted_data, customer_db_data)
+            checks.append(self._verify_against_database(case_id, extracted_data, customer_db_data))
         
-        results["pep_result"] = self._check_pep(case_id, name, extracted_data.get("dob"))
-        results["sanctions_result"] = self._check_sanctions(case_id, name, extracted_data.get("nationality"))
+        check_results = await asyncio.gather(*checks)
+        results["dvs_result"], results["pep_result"], results["sanctions_result"] = check_results[:3]
+        if customer_db_data:
+            results["database_match"] = check_results[3]
         
-        # Determine overall status and log completion
+        return self._finalize(case_id, results, extracted_data, customer_db_data)
+    
+    def _finalize(self, case_id: str, results: Dict[str, Any], extracted_data: Dict[str, Any], customer_db_data: Optional[Dict]) -> Dict[str, Any]:
+        """Determine overall status, log completion and convert records to dicts"""
         results = self._determine_overall_status(case_id, results, extracted_data, customer_db_data)
         
+        # Records -> plain dicts for the workflow state, the database and the dashboard
+        for key in ("dvs_result", "pep_result", "sanctions_result"):
+            results[key] = asdict(results[key])
+        
         return results
     
-    def _check_dvs(self, case_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _check_dvs(self, case_id: str, data: Dict[str, Any], name_upper: str, checked_at: str) -> DVSResult:
         """Check document against Document Verification Service (silent)"""
-        time.sleep(0.5)  # Simulate API call
-        
         doc_number = data.get("document_number") or data.get("id_number")
         
-        if doc_number:
-            return {
-                "verified": True,
-                "match_score": 0.98,
-                "document_valid": True,
-                "document_expired": False,
-                "name_match": True,
-                "dob_match": True,
-                "checked_at": datetime.utcnow().isoformat()
-            }
-        else:
-            return {
-                "verified": False,
-                "match_score": 0,
-                "error": "No document number provided",
-                "checked_at": datetime.utcnow().isoformat()
-            }
+        # Nothing to send to DVS without a document number
+        if not doc_number:
+            return DVSResult(
+                verified=False,
+                match_score=0,
+                checked_at=checked_at,
+                error="No document number provided"
+            )
+        
+        doc_number = str(doc_number).upper().strip()
+        cache_key = (doc_number, name_upper, data.get("dob"))
+        cached = _dvs_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result = await self.backend.dvs(doc_number, name_upper, data.get("dob"), checked_at)
+        _dvs_cache.set(cache_key, result, self.settings.verifier_cache_ttl)
+        return result
     
-    def _verify_against_database(self, case_id: str, extracted: Dict[str, Any], db_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _verify_against_database(self, case_id: str, extracted: Dict[str, Any], db_data: Dict[str, Any]) -> Dict[str, Any]:
         """Verify extracted data against internal customer database (silent)"""
-        time.sleep(0.3)
+        await self.backend.round_trip("database")
         
         discrepancies = []
         matched_fields = []
+        name_match_status = "MATCH"
+        dob_match_status = "MATCH"
         
-        field_mappings = [
-            ("first_name", "first_name", "First Name"),
-            ("last_name", "last_name", "Last Name"),
-            ("dob", "dob", "Date of Birth"),
-            ("document_number", "id_number", "ID Number"),
-            ("id_number", "id_number", "ID Number")
-        ]
-        
-        for ext_field, db_field, display_name in field_mappings:
+        for ext_field, fallback_field, db_field, display_name in _FIELD_MAPPINGS:
             # Get raw value - for document_number, also check id_number as fallback
-            if ext_field == "document_number":
-                raw_ext_value = extracted.get(ext_field) or extracted.get("id_number")
-            else:
-                raw_ext_value = extracted.get(ext_field)
+            raw_ext_value = extracted.get(ext_field)
+            if fallback_field and not raw_ext_value:
+                raw_ext_value = extracted.get(fallback_field)
             
             raw_db_value = db_data.get(db_field)
             
             # Convert to string, handling None/null values properly
             # If value is None, null string, or empty, treat as missing
-            if raw_ext_value in (None, "", "null", "None"):
+            if raw_ext_value in _MISSING:
                 ext_value = None
             else:
                 ext_value = str(raw_ext_value).upper().strip()
@@ -145,7 +552,7 @@ class ExternalVerifierAgent:
                 if ext_value == "NONE":
                     ext_value = None
             
-            if raw_db_value in (None, "", "null", "None"):
+            if raw_db_value in _MISSING:
                 db_value = None
             else:
                 db_value = str(raw_db_value).upper().strip()
@@ -160,7 +567,7 @@ class ExternalVerifierAgent:
                 continue
             
             # Both values exist - compare them
-            if ext_value == db_value or self._is_near_match(ext_value, db_value):
+            if ext_value == db_value or _is_near_match(ext_value, db_value):
                 matched_fields.append(display_name)
             else:
                 discrepancies.append({
@@ -168,114 +575,63 @@ class ExternalVerifierAgent:
                     "document_value": ext_value,
                     "database_value": db_value
                 })
+                if display_name in _NAME_FIELDS:
+                    name_match_status = "NO_MATCH"
+                elif display_name == _DOB_FIELD:
+                    dob_match_status = "NO_MATCH"
         
-        match_percentage = len(matched_fields) / max(len(field_mappings), 1)
+        match_percentage = len(matched_fields) / len(_FIELD_MAPPINGS)
         
         return {
             "status": "VERIFIED" if not discrepancies else "DISCREPANCY",
             "match_percentage": match_percentage,
             "matched_fields": matched_fields,
             "discrepancies": discrepancies,
+            "name_match_status": name_match_status,
+            "dob_match_status": dob_match_status,
             "customer_id": db_data.get("customer_id")
         }
     
-    def _is_near_match(self, value1: str, value2: str) -> bool:
-        """Check if two values are near matches (handle common variations)"""
-        # Remove common variations
-        v1 = value1.replace("-", "").replace(" ", "").replace(".", "")
-        v2 = value2.replace("-", "").replace(" ", "").replace(".", "")
-        
-        if v1 == v2:
-            return True
-        
-        # Check for common name abbreviations
-        # Jon vs John, Bob vs Robert, etc.
-        common_names = {
-            "JON": "JOHN", "JOHN": "JON",
-            "BOB": "ROBERT", "ROBERT": "BOB",
-            "BILL": "WILLIAM", "WILLIAM": "BILL",
-            "MIKE": "MICHAEL", "MICHAEL": "MIKE",
-            "JIM": "JAMES", "JAMES": "JIM"
-        }
-        
-        if common_names.get(v1) == v2 or common_names.get(v2) == v1:
-            return True
-        
-        # Check Levenshtein distance for typos
-        if len(v1) > 3 and len(v2) > 3:
-            distance = self._levenshtein_distance(v1, v2)
-            if distance <= 2:  # Allow up to 2 character differences
-                return True
-        
-        return False
-    
-    def _levenshtein_distance(self, s1: str, s2: str) -> int:
-        """Calculate Levenshtein distance between two strings"""
-        if len(s1) < len(s2):
-            return self._levenshtein_distance(s2, s1)
-        
-        if len(s2) == 0:
-            return len(s1)
-        
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-        
-        return previous_row[-1]
-    
-    def _check_pep(self, case_id: str, name: str, dob: Optional[str]) -> Dict[str, Any]:
+    async def _check_pep(self, case_id: str, name_upper: str, dob: Optional[str], checked_at: str) -> PEPResult:
         """Check against Politically Exposed Persons database (silent)"""
-        time.sleep(0.4)  # Simulate API call
-        
-        is_pep = "POLITICIAN" in name.upper() or "MINISTER" in name.upper()
-        
-        return {
-            "checked": True,
-            "is_pep": is_pep,
-            "match_type": "exact" if is_pep else None,
-            "pep_category": "Government Official" if is_pep else None,
-            "sources": ["World-Check", "Dow Jones", "Refinitiv"],
-            "checked_at": datetime.utcnow().isoformat()
-        }
+        cache_key = (name_upper, dob)
+        cached = _pep_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result = await self.backend.pep(name_upper, dob, checked_at)
+        _pep_cache.set(cache_key, result, self.settings.verifier_cache_ttl)
+        return result
     
-    def _check_sanctions(self, case_id: str, name: str, nationality: Optional[str]) -> Dict[str, Any]:
+    async def _check_sanctions(self, case_id: str, name_upper: str, nationality: Optional[str], checked_at: str) -> SanctionsResult:
         """Check against sanctions lists (OFAC, UN, EU) - silent"""
-        time.sleep(0.5)  # Simulate API calls
-        
-        is_sanctioned = "SANCTIONED" in name.upper()
-        
-        return {
-            "checked": True,
-            "is_sanctioned": is_sanctioned,
-            "lists_checked": ["OFAC SDN", "UN Consolidated", "EU Sanctions"],
-            "match_details": None if not is_sanctioned else {"list": "OFAC SDN", "match_score": 1.0},
-            "checked_at": datetime.utcnow().isoformat()
-        }
+        cache_key = (name_upper, nationality)
+        cached = _sanctions_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result = await self.backend.sanctions(name_upper, nationality, checked_at)
+        _sanctions_cache.set(cache_key, result, self.settings.verifier_cache_ttl)
+        return result
     
     def _determine_overall_status(self, case_id: str, results: Dict[str, Any], extracted_data: Dict[str, Any] = None, customer_db_data: Dict[str, Any] = None) -> Dict[str, Any]:
         """Determine overall verification status and log completion"""
         risk_indicators = []
         
         # Check for sanctions hit - automatic flag
-        if results["sanctions_result"] and results["sanctions_result"].get("is_sanctioned"):
+        if results["sanctions_result"] and results["sanctions_result"].is_sanctioned:
             results["overall_status"] = "FLAGGED"
             results["requires_human_review"] = True
             risk_indicators.append("SANCTIONS_MATCH")
         
         # Check for PEP status - requires enhanced due diligence
-        elif results["pep_result"] and results["pep_result"].get("is_pep"):
+        elif results["pep_result"] and results["pep_result"].is_pep:
             results["overall_status"] = "FLAGGED"
             results["requires_human_review"] = True
             risk_indicators.append("PEP_MATCH")
         
         # Check DVS verification
-        elif results["dvs_result"] and not results["dvs_result"].get("verified"):
+        elif results["dvs_result"] and not results["dvs_result"].verified:
             results["overall_status"] = "NO_MATCH"
             results["requires_human_review"] = True
             risk_indicators.append("DVS_FAILED")
@@ -297,47 +653,26 @@ class ExternalVerifierAgent:
         
         results["risk_indicators"] = risk_indicators
         
-        status_emoji = {
-            "VERIFIED": "✓",
-            "PARTIAL_MATCH": "⚠",
-            "NO_MATCH": "✗",
-            "FLAGGED": "🚨"
-        }
-        
         # Build detailed check results for frontend
-        dvs_status = "VERIFIED" if results.get("dvs_result", {}).get("verified") else "FAILED"
-        pep_status = "FLAGGED" if results.get("pep_result", {}).get("is_pep") else "CLEAR"
-        sanctions_status = "FLAGGED" if results.get("sanctions_result", {}).get("is_sanctioned") else "CLEAR"
+        dvs_status = "VERIFIED" if results["dvs_result"].verified else "FAILED"
+        pep_status = "FLAGGED" if results["pep_result"].is_pep else "CLEAR"
+        sanctions_status = "FLAGGED" if results["sanctions_result"].is_sanctioned else "CLEAR"
         
         db_match = results.get("database_match", {})
         
-        # Calculate name and DOB match status from discrepancies
-        name_match = "MATCH"
-        dob_match = "MATCH"
-        
-        if db_match.get("discrepancies"):
-            for disc in db_match["discrepancies"]:
-                if "First Name" in disc.get("field", "") or "Last Name" in disc.get("field", ""):
-                    name_match = "NO_MATCH"
-                if "Date of Birth" in disc.get("field", ""):
-                    dob_match = "NO_MATCH"
-        
-        # If we have matched fields, check if name/DOB are in there
-        if db_match.get("matched_fields"):
-            matched = db_match["matched_fields"]
-            if "First Name" in matched and "Last Name" in matched:
-                name_match = "MATCH"
-            if "Date of Birth" in matched:
-                dob_match = "MATCH"
+        # Name and DOB match status, derived while comparing fields
+        name_match = db_match.get("name_match_status", "MATCH")
+        dob_match = db_match.get("dob_match_status", "MATCH")
         
         # Format discrepancies for rationale
-        rationale = []
-        for d in db_match.get("discrepancies", []):
-            rationale.append(f"{d['field']}: Document '{d['document_value']}' vs Database '{d['database_value']}'")
+        rationale = [
+            f"{d['field']}: Document '{d['document_value']}' vs Database '{d['database_value']}'"
+            for d in db_match.get("discrepancies", ())
+        ]
         
-        # Prepare comparison data for frontend
+        # Prepare comparison data for frontend (only shown for cases under review)
         comparison_data = None
-        if extracted_data and customer_db_data:
+        if results["requires_human_review"] and extracted_data and customer_db_data:
             comparison_data = {
                 "extracted": {
                     "first_name": extracted_data.get("first_name", ""),
@@ -357,7 +692,7 @@ class ExternalVerifierAgent:
             case_id=case_id,
             agent=AgentType.EXTERNAL_VERIFIER,
             action="Verification Complete",
-            details=f"{status_emoji.get(results['overall_status'], '•')} Overall status: {results['overall_status']}",
+            details=f"{_STATUS_EMOJI.get(results['overall_status'], '•')} Overall status: {results['overall_status']}",
             status=ActivityStatus.SUCCESS if results["overall_status"] == "VERIFIED" else ActivityStatus.WARNING,
             data={
                 "overall_status": results["overall_status"],
@@ -11,11 +11,15 @@ This implements the AUSTRAC-compliant ACIP workflow with:
 
 import os
 import uuid
+import asyncio
 import json
-from typing import TypedDict, Literal, Optional, Annotated, Any, Dict
+import operator
+from typing import TypedDict, Literal, Optional, Annotated, Any, Dict, AsyncIterator
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, lru_cache
 from langgraph.graph import StateGraph, END
-from langgraph.types import interrupt, Command
+from langgraph.types import interrupt, Command, Send
 from app.config import get_settings
 from app.services.agents import (
     DocumentInspectorAgent,
@@ -28,9 +32,21 @@ from app.services.agents import (
 
 settings = get_settings()
 
+# Sync start_case() called from inside a running event loop runs the graph here
+_sync_runner = ThreadPoolExecutor(max_workers=4, thread_name_prefix="acip-workflow")
+
 
 # ============== State Definition ==============
 
+def merge_dict(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Reducer letting the fanned-out verification checks each write their own keys."""
+    if right is None:
+        return left
+    if left is None:
+        return right
+    return {**left, **right}
+
+
 class WorkflowState(TypedDict):
     """State schema for the ACIP workflow."""
     # Case identification
@@ -49,7 +65,7 @@ class WorkflowState(TypedDict):
     
     # Agent results
     inspection_result: Optional[Dict[str, Any]]
-    verification_result: Optional[Dict[str, Any]]
+    verification_result: Annotated[Optional[Dict[str, Any]], merge_dict]
     compliance_result: Optional[Dict[str, Any]]
     
     # Legacy fields for compatibility
@@ -67,13 +83,25 @@ class WorkflowState(TypedDict):
     final_decision: Optional[str]
     completion_time: Optional[str]
     
-    # Audit trail
-    audit_trail: list
+    # Audit trail (nodes return only their new entries)
+    audit_trail: Annotated[list, operator.add]
+
+
+_STATE_KEYS = frozenset(WorkflowState.__annotations__)
 
 
 # ============== Workflow Nodes ==============
 
-def start_workflow(state: WorkflowState) -> WorkflowState:
+def _audit(step: str, agent: Optional[str] = None, **extras) -> Dict[str, Any]:
+    """Builds one audit-trail entry: step, ISO timestamp, acting agent (if any) and extras."""
+    entry = {"step": step, "timestamp": datetime.utcnow().isoformat()}
+    if agent:
+        entry["agent"] = agent
+    entry.update(extras)
+    return entry
+
+
+def start_workflow(state: WorkflowState) -> Dict[str, Any]:
     """Initialize the workflow"""
     case_id = state.get("case_id", "unknown")
     
@@ -90,21 +118,22 @@ def start_workflow(state: WorkflowState) -> WorkflowState:
     )
     
     return {
-        **state,
         "status": "processing",
-        "audit_trail": state.get("audit_trail", []) + [{
-            "step": "workflow_started",
-            "timestamp": datetime.utcnow().isoformat(),
-            "details": "ACIP verification workflow initiated"
-        }]
+        "audit_trail": [_audit("workflow_started", details="ACIP verification workflow initiated")]
     }
 
 
-def document_inspection_node(state: WorkflowState) -> WorkflowState:
+async def document_inspection_node(
+    state: WorkflowState,
+    inspector: Optional[DocumentInspectorAgent] = None,
+    officer: Optional[ComplianceOfficerAgent] = None
+) -> Dict[str, Any]:
     """
     Node: Document Inspector Agent
     
-    Extracts and validates data from the ID document.
+    Extracts and validates data from the ID document. When inspection fails
+    the case is escalated here and route_after_inspection sends it straight
+    to human review, skipping verification and the compliance assessment.
     """
     case_id = state.get("case_id", "unknown")
     document_path = state.get("document_path", "")
@@ -115,86 +144,143 @@ def document_inspection_node(state: WorkflowState) -> WorkflowState:
     print(f"  Case: {case_id}")
     print(f"{'='*60}\n")
     
-    agent = DocumentInspectorAgent()
-    result = agent.inspect(case_id, document_path, customer_db_data=customer_db_data)
+    agent = inspector or DocumentInspectorAgent()
+    result = await agent.inspect_async(case_id, document_path, customer_db_data=customer_db_data)
     
     # Map to legacy fields for compatibility
     extraction_result = result.get("extracted_data")
     
-    audit_entry = {
-        "step": "document_inspection",
-        "timestamp": datetime.utcnow().isoformat(),
-        "agent": "Document Inspector",
-        "success": result.get("success", False),
-        "document_type": result.get("document_type"),
-        "quality_score": result.get("quality_score"),
-        "issues": result.get("issues", [])
-    }
+    audit_entry = _audit(
+        "document_inspection", "Document Inspector",
+        success=result.get("success", False),
+        document_type=result.get("document_type"),
+        quality_score=result.get("quality_score"),
+        issues=result.get("issues", [])
+    )
+    
+    if result.get("success"):
+        return {
+            "status": "verifying",
+            "inspection_result": result,
+            "extraction_result": extraction_result,
+            "extraction_error": None,
+            "audit_trail": [audit_entry]
+        }
+    
+    activity_logger.log(
+        case_id=case_id,
+        agent=AgentType.EXTERNAL_VERIFIER,
+        action="Verification Skipped",
+        details="Skipping external checks due to document inspection failure",
+        status=ActivityStatus.WARNING
+    )
+    compliance_result = (officer or ComplianceOfficerAgent()).assess_failed_inspection(case_id, result)
+    
+    # Same compliance_decision entry the normal path records, so the trail
+    # still shows the escalation
+    decision_entry = _audit(
+        "compliance_decision", "Compliance Officer",
+        decision=compliance_result.get("decision", "ESCALATE"),
+        risk_level=compliance_result.get("risk_level", "HIGH"),
+        confidence_score=compliance_result.get("confidence_score"),
+        reasoning=compliance_result.get("reasoning"),
+        risk_factors=compliance_result.get("risk_factors", []),
+        reason=compliance_result.get("reason")
+    )
     
     return {
-        **state,
-        "status": "verifying" if result.get("success") else "awaiting_human",
+        "status": "awaiting_human",
+        "risk_level": "high",
         "inspection_result": result,
         "extraction_result": extraction_result,
-        "extraction_error": None if result.get("success") else "Document inspection failed",
-        "audit_trail": state.get("audit_trail", []) + [audit_entry]
+        "extraction_error": "Document inspection failed",
+        "verification_result": {"overall_status": "SKIPPED", "reason": "Document inspection failed"},
+        "compliance_result": compliance_result,
+        "final_decision": "ESCALATE",
+        "review_result": {"status": "ESCALATE", "risk_level": "HIGH"},
+        "audit_trail": [audit_entry, decision_entry]
     }
 
 
-def external_verification_node(state: WorkflowState) -> WorkflowState:
+def external_verification_node(state: WorkflowState) -> Dict[str, Any]:
     """
-    Node: External Verifier Agent
+    Node: External Verifier Agent (dispatch)
     
-    Verifies against DVS, PEP, and Sanctions lists.
+    Starts the DVS, PEP, Sanctions and database checks; route_to_checks
+    fans them out as parallel branches.
     """
     case_id = state.get("case_id", "unknown")
-    inspection_result = state.get("inspection_result", {})
     
     print(f"\n{'='*60}")
     print(f"  PHASE 2: EXTERNAL VERIFICATION")
     print(f"  Case: {case_id}")
     print(f"{'='*60}\n")
     
-    # Skip if document inspection failed
-    if not inspection_result.get("success"):
-        activity_logger.log(
-            case_id=case_id,
-            agent=AgentType.EXTERNAL_VERIFIER,
-            action="Verification Skipped",
-            details="Skipping external checks due to document inspection failure",
-            status=ActivityStatus.WARNING
+    activity_logger.log(
+        case_id=case_id,
+        agent=AgentType.EXTERNAL_VERIFIER,
+        action="Verifying",
+        details="Checking DVS, PEP & Sanctions databases...",
+        status=ActivityStatus.IN_PROGRESS
+    )
+    
+    return {}
+
+
+def _verification_check_node(check: str, result_key: str):
+    """Build a fan-out node running one external check on its Send payload."""
+    async def node(payload: Dict[str, Any], verifier: Optional[ExternalVerifierAgent] = None) -> Dict[str, Any]:
+        result = await (verifier or ExternalVerifierAgent()).run_check_async(
+            check,
+            payload["case_id"],
+            payload["extracted_data"],
+            payload.get("customer_db_data"),
+            checked_at=payload["checked_at"]
         )
-        return {
-            **state,
-            "verification_result": {"overall_status": "SKIPPED", "reason": "Document inspection failed"}
-        }
+        # Only this branch's key; merge_dict folds the branches together
+        return {"verification_result": {result_key: result}}
     
-    extracted_data = inspection_result.get("extracted_data", {})
+    node.__name__ = f"{check}_check_node"
+    return node
+
+
+dvs_check_node = _verification_check_node("dvs", "dvs_result")
+pep_check_node = _verification_check_node("pep", "pep_result")
+sanctions_check_node = _verification_check_node("sanctions", "sanctions_result")
+database_check_node = _verification_check_node("database", "database_match")
+
+
+def aggregate_verification_node(state: WorkflowState, verifier: Optional[ExternalVerifierAgent] = None) -> Dict[str, Any]:
+    """
+    Node: External Verifier Agent (fan-in)
+    
+    Combines the DVS, PEP, Sanctions and database results into the overall
+    verification outcome.
+    """
+    case_id = state.get("case_id", "unknown")
+    extracted_data = state.get("inspection_result", {}).get("extracted_data", {})
     customer_db_data = state.get("customer_db_data")
     
-    agent = ExternalVerifierAgent()
-    result = agent.verify(case_id, extracted_data, customer_db_data)
-    
-    audit_entry = {
-        "step": "external_verification",
-        "timestamp": datetime.utcnow().isoformat(),
-        "agent": "External Verifier",
-        "overall_status": result.get("overall_status"),
-        "dvs_verified": result.get("dvs_result", {}).get("verified", False),
-        "pep_clear": not result.get("pep_result", {}).get("is_pep", False),
-        "sanctions_clear": not result.get("sanctions_result", {}).get("is_sanctioned", False),
-        "requires_human_review": result.get("requires_human_review", False)
-    }
+    agent = verifier or ExternalVerifierAgent()
+    result = agent.summarize(case_id, state.get("verification_result") or {}, extracted_data, customer_db_data)
+    
+    audit_entry = _audit(
+        "external_verification", "External Verifier",
+        overall_status=result.get("overall_status"),
+        dvs_verified=result.get("dvs_result", {}).get("verified", False),
+        pep_clear=not result.get("pep_result", {}).get("is_pep", False),
+        sanctions_clear=not result.get("sanctions_result", {}).get("is_sanctioned", False),
+        requires_human_review=result.get("requires_human_review", False)
+    )
     
     return {
-        **state,
         "status": "compliance_review",
         "verification_result": result,
-        "audit_trail": state.get("audit_trail", []) + [audit_entry]
+        "audit_trail": [audit_entry]
     }
 
 
-def compliance_decision_node(state: WorkflowState) -> WorkflowState:
+def compliance_decision_node(state: WorkflowState, officer: Optional[ComplianceOfficerAgent] = None) -> Dict[str, Any]:
     """
     Node: Compliance Officer Agent
     
@@ -209,7 +295,7 @@ def compliance_decision_node(state: WorkflowState) -> WorkflowState:
     print(f"  Case: {case_id}")
     print(f"{'='*60}\n")
     
-    agent = ComplianceOfficerAgent()
+    agent = officer or ComplianceOfficerAgent()
     result = agent.assess(
         case_id=case_id,
         inspection_result=inspection_result,
@@ -232,28 +318,25 @@ def compliance_decision_node(state: WorkflowState) -> WorkflowState:
     else:  # ESCALATE or APPROVE - always require human review
         next_status = "awaiting_human"
     
-    audit_entry = {
-        "step": "compliance_decision",
-        "timestamp": datetime.utcnow().isoformat(),
-        "agent": "Compliance Officer",
-        "decision": decision,
-        "risk_level": risk_level,
-        "confidence_score": result.get("confidence_score"),
-        "reasoning": result.get("reasoning")
-    }
+    audit_entry = _audit(
+        "compliance_decision", "Compliance Officer",
+        decision=decision,
+        risk_level=risk_level,
+        confidence_score=result.get("confidence_score"),
+        reasoning=result.get("reasoning")
+    )
     
     return {
-        **state,
         "status": next_status,
         "risk_level": risk_level.lower(),
         "compliance_result": result,
         "final_decision": decision,
         "review_result": {"status": decision, "risk_level": risk_level},
-        "audit_trail": state.get("audit_trail", []) + [audit_entry]
+        "audit_trail": [audit_entry]
     }
 
 
-def human_review_node(state: WorkflowState) -> WorkflowState:
+def human_review_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Node: Human-in-the-loop review point.
     
@@ -315,24 +398,17 @@ def human_review_node(state: WorkflowState) -> WorkflowState:
         data={"decision": decision, "actor": actor}
     )
     
-    audit_entry = {
-        "step": "human_review",
-        "timestamp": datetime.utcnow().isoformat(),
-        "decision": decision,
-        "actor": actor,
-        "notes": notes
-    }
+    audit_entry = _audit("human_review", decision=decision, actor=actor, notes=notes)
     
     return {
-        **state,
         "human_decision": decision,
         "human_notes": notes,
         "human_actor": actor,
-        "audit_trail": state.get("audit_trail", []) + [audit_entry]
+        "audit_trail": [audit_entry]
     }
 
 
-def finalize_case(state: WorkflowState) -> WorkflowState:
+def finalize_case(state: WorkflowState) -> Dict[str, Any]:
     """
     Node: Finalize the case based on decision.
     """
@@ -362,16 +438,16 @@ def finalize_case(state: WorkflowState) -> WorkflowState:
         data={"final_status": final_status}
     )
     
+    # Make sure the case's activity log is fully written before the workflow returns
+    activity_logger.flush()
+    
+    audit_entry = _audit("workflow_completed", final_status=final_status)
+    
     return {
-        **state,
         "status": final_status,
         "final_status": final_status,
-        "completion_time": datetime.utcnow().isoformat(),
-        "audit_trail": state.get("audit_trail", []) + [{
-            "step": "workflow_completed",
-            "timestamp": datetime.utcnow().isoformat(),
-            "final_status": final_status
-        }]
+        "completion_time": audit_entry["timestamp"],
+        "audit_trail": [audit_entry]
     }
 
 
@@ -389,6 +465,32 @@ def route_after_compliance(state: WorkflowState) -> str:
         return "human_review"
 
 
+def route_after_inspection(state: WorkflowState) -> str:
+    """Failed inspections have nothing to verify - send them straight to a human"""
+    if not (state.get("inspection_result") or {}).get("success"):
+        return "human_review"
+    return "external_verification"
+
+
+def route_to_checks(state: WorkflowState):
+    """Fan the external checks out in parallel"""
+    payload = {
+        "case_id": state.get("case_id", "unknown"),
+        "extracted_data": state.get("inspection_result", {}).get("extracted_data", {}),
+        "customer_db_data": state.get("customer_db_data"),
+        # The checks run concurrently, so they share one verification timestamp
+        "checked_at": datetime.utcnow().isoformat()
+    }
+    sends = [
+        Send("dvs_check", payload),
+        Send("pep_check", payload),
+        Send("sanctions_check", payload)
+    ]
+    if payload["customer_db_data"]:
+        sends.append(Send("database_check", payload))
+    return sends
+
+
 def route_after_human_decision(state: WorkflowState) -> str:
     """Route after human decision is made"""
     return "finalize"
@@ -396,16 +498,33 @@ def route_after_human_decision(state: WorkflowState) -> str:
 
 # ============== Build Workflow Graph ==============
 
-def build_acip_workflow() -> StateGraph:
-    """Build the LangGraph workflow for ACIP verification."""
+def build_acip_workflow(
+    inspector: Optional[DocumentInspectorAgent] = None,
+    verifier: Optional[ExternalVerifierAgent] = None,
+    officer: Optional[ComplianceOfficerAgent] = None
+) -> StateGraph:
+    """
+    Build the LangGraph workflow for ACIP verification.
+    
+    The agents are created once here and shared by every run of the graph,
+    so provider clients and their connection pools are reused across cases.
+    """
+    inspector = inspector or DocumentInspectorAgent()
+    verifier = verifier or ExternalVerifierAgent()
+    officer = officer or ComplianceOfficerAgent()
     
     workflow = StateGraph(WorkflowState)
     
     # Add nodes
     workflow.add_node("start", start_workflow)
-    workflow.add_node("document_inspection", document_inspection_node)
+    workflow.add_node("document_inspection", partial(document_inspection_node, inspector=inspector, officer=officer))
     workflow.add_node("external_verification", external_verification_node)
-    workflow.add_node("compliance_decision", compliance_decision_node)
+    workflow.add_node("dvs_check", partial(dvs_check_node, verifier=verifier))
+    workflow.add_node("pep_check", partial(pep_check_node, verifier=verifier))
+    workflow.add_node("sanctions_check", partial(sanctions_check_node, verifier=verifier))
+    workflow.add_node("database_check", partial(database_check_node, verifier=verifier))
+    workflow.add_node("aggregate_verification", partial(aggregate_verification_node, verifier=verifier))
+    workflow.add_node("compliance_decision", partial(compliance_decision_node, officer=officer))
     workflow.add_node("human_review", human_review_node)
     workflow.add_node("finalize", finalize_case)
     
@@ -414,8 +533,27 @@ def build_acip_workflow() -> StateGraph:
     
     # Add edges
     workflow.add_edge("start", "document_inspection")
-    workflow.add_edge("document_inspection", "external_verification")
-    workflow.add_edge("external_verification", "compliance_decision")
+    
+    # Failed inspections skip verification and compliance
+    workflow.add_conditional_edges(
+        "document_inspection",
+        route_after_inspection,
+        {
+            "external_verification": "external_verification",
+            "human_review": "human_review"
+        }
+    )
+    
+    # Fan out the independent external checks, then fan back in.
+    # All Send branches run in the same step, so aggregate runs once.
+    workflow.add_conditional_edges(
+        "external_verification",
+        route_to_checks,
+        ["dvs_check", "pep_check", "sanctions_check", "database_check"]
+    )
+    for check_node in ("dvs_check", "pep_check", "sanctions_check", "database_check"):
+        workflow.add_edge(check_node, "aggregate_verification")
+    workflow.add_edge("aggregate_verification", "compliance_decision")
     
     # Conditional routing after compliance decision
     workflow.add_conditional_edges(
@@ -436,6 +574,17 @@ def build_acip_workflow() -> StateGraph:
     return workflow
 
 
+# Built once per process: node registration and edge validation are not
+# repeated for every ACIPWorkflow, and all instances share the same agents
+_GRAPH = build_acip_workflow()
+
+
+@lru_cache(maxsize=None)
+def _compile(checkpointer=None):
+    """Compiled app for a checkpointer, reused by every workflow bound to it"""
+    return _GRAPH.compile(checkpointer=checkpointer)
+
+
 # ============== Workflow Manager ==============
 
 class ACIPWorkflow:
@@ -445,8 +594,9 @@ class ACIPWorkflow:
     
     def __init__(self, checkpointer=None):
         """Initialize the workflow with optional checkpointing."""
-        self.graph = build_acip_workflow()
-        self.app = self.graph.compile(checkpointer=checkpointer)
+        self.checkpointer = checkpointer
+        self.graph = _GRAPH
+        self.app = _compile(checkpointer)
     
     def start_case(
         self,
@@ -459,6 +609,29 @@ class ACIPWorkflow:
         """
         Start a new ACIP verification workflow.
         
+        Blocking wrapper around astart_case(); see it for arguments.
+        """
+        coro = self.astart_case(case_id, customer_name, document_path, customer_email, customer_db_data)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        return _sync_runner.submit(asyncio.run, coro).result()
+    
+    async def astart_case(
+        self,
+        case_id: str,
+        customer_name: str,
+        document_path: str,
+        customer_email: Optional[str] = None,
+        customer_db_data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Start a new ACIP verification workflow without blocking the event loop.
+        
+        Nodes run as coroutines, so LLM and provider calls for concurrent
+        cases overlap instead of queueing behind each other.
+        
         Args:
             case_id: Unique identifier for the case
             customer_name: Customer's full name
@@ -469,9 +642,60 @@ class ACIPWorkflow:
         Returns:
             Final workflow state
         """
-        thread_id = str(uuid.uuid4())
+        initial_state = self._initial_state(
+            str(uuid.uuid4()), case_id, customer_name, document_path, customer_email, customer_db_data
+        )
+        config = {"configurable": {"thread_id": initial_state["thread_id"]}}
+        
+        # Run the workflow; only the final state is materialized. Runs that
+        # stop at human review never reach finalize, so flush the case's
+        # activity log here too
+        try:
+            final_state = await self.app.ainvoke(initial_state, config)
+        finally:
+            await asyncio.to_thread(activity_logger.flush)
+        if not final_state:
+            return initial_state
+        final_state.pop("__interrupt__", None)
+        return final_state
+    
+    async def astream_case(
+        self,
+        case_id: str,
+        customer_name: str,
+        document_path: str,
+        customer_email: Optional[str] = None,
+        customer_db_data: Optional[Dict[str, Any]] = None,
+        thread_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Start a new ACIP verification workflow and yield progress as it runs.
+        
+        Yields LangGraph "updates" events - {node_name: changed_keys} - so
+        callers see each step without a full state copy per event.
+        Pass thread_id to resume or inspect the run later.
+        """
+        initial_state = self._initial_state(
+            thread_id or str(uuid.uuid4()), case_id, customer_name, document_path, customer_email, customer_db_data
+        )
+        config = {"configurable": {"thread_id": initial_state["thread_id"]}}
         
-        initial_state = WorkflowState(
+        try:
+            async for event in self.app.astream(initial_state, config, stream_mode="updates"):
+                yield event
+        finally:
+            await asyncio.to_thread(activity_logger.flush)
+    
+    @staticmethod
+    def _initial_state(
+        thread_id: str,
+        case_id: str,
+        customer_name: str,
+        document_path: str,
+        customer_email: Optional[str],
+        customer_db_data: Optional[Dict[str, Any]]
+    ) -> WorkflowState:
+        return WorkflowState(
             case_id=case_id,
             thread_id=thread_id,
             customer_name=customer_name,
@@ -494,15 +718,6 @@ class ACIPWorkflow:
             completion_time=None,
             audit_trail=[]
         )
-        
-        config = {"configurable": {"thread_id": thread_id}}
-        
-        # Run the workflow
-        final_state = None
-        for event in self.app.stream(initial_state, config, stream_mode="values"):
-            final_state = event
-        
-        return final_state or initial_state
     
     def resume_with_human_input(
         self,
@@ -533,17 +748,35 @@ class ACIPWorkflow:
             }
         )
         
-        final_state = None
-        for event in self.app.stream(human_input, config, stream_mode="values"):
-            final_state = event
-        
+        final_state = self.app.invoke(human_input, config)
+        if final_state:
+            final_state.pop("__interrupt__", None)
         return final_state
     
     def get_state(self, thread_id: str) -> Optional[Dict[str, Any]]:
-        """Get the current state of a workflow."""
+        """
+        Get the current state of a workflow.
+        
+        Reads the latest checkpoint directly rather than building a full
+        StateSnapshot; use get_snapshot() when next nodes or versions are needed.
+        """
+        if self.checkpointer is None:
+            return None
+        config = {"configurable": {"thread_id": thread_id}}
+        try:
+            checkpoint_tuple = self.checkpointer.get_tuple(config)
+        except Exception:
+            return None
+        if checkpoint_tuple is None:
+            return None
+        channel_values = checkpoint_tuple.checkpoint["channel_values"]
+        # Drop LangGraph's internal channels (pending sends, branch triggers)
+        return {key: value for key, value in channel_values.items() if key in _STATE_KEYS}
+    
+    def get_snapshot(self, thread_id: str):
+        """Get the full StateSnapshot of a workflow (values, next nodes, metadata)."""
         config = {"configurable": {"thread_id": thread_id}}
         try:
-            state = self.app.get_state(config)
-            return state.values if state else None
+            return self.app.get_state(config)
         except Exception:
             return None
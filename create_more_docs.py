@@ -1,18 +1,30 @@
 from PIL import Image, ImageDraw, ImageFont
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 import os
 
+FONT_PATH = "/System/Library/Fonts/Helvetica.ttc"
+
+@lru_cache(maxsize=None)
+def _font(size):
+    # Loaded once per size and shared by every generated document
+    try:
+        return ImageFont.truetype(FONT_PATH, size)
+    except OSError:
+        return ImageFont.load_default()
+
+@lru_cache(maxsize=None)
+def _blank_page(width, height):
+    return Image.new('RGB', (width, height), 'white')
+
 def create_image(filename, text_lines, title="DOCUMENT"):
     width = 600
     height = 400
-    image = Image.new('RGB', (width, height), 'white')
+    image = _blank_page(width, height).copy()
     draw = ImageDraw.Draw(image)
     
-    try:
-        font_large = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 30)
-        font_medium = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 20)
-    except:
-        font_large = ImageFont.load_default()
-        font_medium = ImageFont.load_default()
+    font_large = _font(30)
+    font_medium = _font(20)
 
     draw.rectangle([(10, 10), (590, 390)], outline="black", width=2)
     draw.text((20, 20), title, font=font_large, fill="black")
@@ -26,38 +38,47 @@ def create_image(filename, text_lines, title="DOCUMENT"):
     image.save(output_path)
     print(f"Created {output_path}")
 
-def generate_docs():
+# (filename, text_lines, title) for each sample document
+SPECS = [
     # 1. Perfect Match (Jane Smith)
-    create_image("jane_license.png", [
+    ("jane_license.png", [
         "License No: D98765432",
         "Surname: SMITH",
         "First Name: JANE",
         "DOB: 1985-05-15",
         "Type: DRIVING_LICENSE"
-    ], "DRIVING LICENSE")
+    ], "DRIVING LICENSE"),
 
     # 2. Name Mismatch (Alice Wonder vs Wonderland)
-    create_image("alice_passport.png", [
+    ("alice_passport.png", [
         "Passport No: P11223344",
         "Surname: WONDERLAND",  # Mismatch! DB says WONDER
         "Given Names: ALICE",
         "DOB: 1992-03-10",
         "Nationality: UK"
-    ], "PASSPORT")
+    ], "PASSPORT"),
 
     # 3. ID Not Found (Unknown Person)
-    create_image("unknown_id.png", [
+    ("unknown_id.png", [
         "ID No: X99999999",     # Not in DB
         "Name: STRANGER DANGER",
         "DOB: 2000-01-01"
-    ], "ID CARD")
+    ], "ID CARD"),
 
     # 4. Perfect Match (Bob Builder)
-    create_image("bob_license.png", [
+    ("bob_license.png", [
         "License No: L55667788",
         "Name: BOB BUILDER",
         "DOB: 1980-11-20"
-    ], "DRIVING LICENSE")
+    ], "DRIVING LICENSE"),
+]
+
+def generate_docs(specs=SPECS, max_workers=None):
+    # Rendering and PNG encoding are CPU-bound and independent per document,
+    # so spread them over processes (fonts are loaded inside each worker)
+    filenames, text_lines, titles = zip(*specs)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(create_image, filenames, text_lines, titles))
 
 if __name__ == "__main__":
     generate_docs()
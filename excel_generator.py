@@ -1,5 +1,32 @@
-import pandas as pd
-import os
+import xlsxwriter
+
+# Column width reserved up front (constant_memory mode cannot autofit later)
+DEFAULT_COLUMN_WIDTH = 18
+
+def _cell_value(value):
+    """Scalars go in as-is, anything else (dicts, lists) as its string form."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def write_sheet(workbook, sheet_name: str, columns: list, rows):
+    """
+    Streams rows (dicts) into a new worksheet under a header of `columns`.
+    Rows are written in order and never held in memory together, so this
+    works with workbooks opened in constant_memory mode.
+    """
+    worksheet = workbook.add_worksheet(sheet_name)
+    if not columns:
+        return worksheet
+
+    header_format = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+    worksheet.set_column(0, len(columns) - 1, DEFAULT_COLUMN_WIDTH)
+    worksheet.write_row(0, 0, columns, header_format)
+
+    for row_idx, row in enumerate(rows, start=1):
+        worksheet.write_row(row_idx, 0, [_cell_value(row.get(col)) for col in columns])
+
+    return worksheet
 
 def generate_excel_report(data_list: list, output_path: str):
     """
@@ -9,43 +36,48 @@ def generate_excel_report(data_list: list, output_path: str):
         print("No data to write to Excel.")
         return
 
-    # Flatten data for main sheet (one row per invoice)
-    # We might want a separate sheet for line items if needed, 
-    # but for now let's keep it simple: One row per invoice. 
-    # Or maybe we flatten items? Let's do a main summary sheet.
-    
-    summary_data = []
-    all_items = []
+    # One summary row per invoice, plus a separate sheet for line items
+    # (linked by invoice number)
+    summary_columns = ["Invoice Number", "Date", "Vendor", "Total Amount", "Currency"]
 
+    # Line item columns are the union of item keys in first-seen order, so
+    # collect them before any row is written
+    item_columns = {}
     for entry in data_list:
         if not entry:
             continue
-            
-        # Summary row
-        summary_data.append({
-            "Invoice Number": entry.get("invoice_number"),
-            "Date": entry.get("date"),
-            "Vendor": entry.get("vendor"),
-            "Total Amount": entry.get("total_amount"),
-            "Currency": entry.get("currency")
-        })
-
-        # Items rows (linked by invoice number)
-        for item in entry.get("items", []):
-            item_row = item.copy()
-            item_row["Invoice Number"] = entry.get("invoice_number")
-            all_items.append(item_row)
-
-    df_summary = pd.DataFrame(summary_data)
-    df_items = pd.DataFrame(all_items)
-
-    # Reorder columns for better readability if possible
-    # (Pandas defaults are usually okay, but let's ensure Invoice Number is first)
-    
+        for item in entry.get("items") or []:
+            item_columns.update(dict.fromkeys(item))
+            item_columns.setdefault("Invoice Number")
+
+    def summary_rows():
+        for entry in data_list:
+            if not entry:
+                continue
+            yield {
+                "Invoice Number": entry.get("invoice_number"),
+                "Date": entry.get("date"),
+                "Vendor": entry.get("vendor"),
+                "Total Amount": entry.get("total_amount"),
+                "Currency": entry.get("currency")
+            }
+
+    def item_rows():
+        for entry in data_list:
+            if not entry:
+                continue
+            for item in entry.get("items") or []:
+                item_row = item.copy()
+                item_row["Invoice Number"] = entry.get("invoice_number")
+                yield item_row
+
     try:
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            df_summary.to_excel(writer, sheet_name='Invoices', index=False)
-            df_items.to_excel(writer, sheet_name='Line Items', index=False)
+        workbook = xlsxwriter.Workbook(output_path, {"constant_memory": True})
+        try:
+            write_sheet(workbook, "Invoices", summary_columns, summary_rows())
+            write_sheet(workbook, "Line Items", list(item_columns), item_rows())
+        finally:
+            workbook.close()
         print(f"Report generated successfully at {output_path}")
     except Exception as e:
         print(f"Error generating Excel report: {e}")
@@ -1,11 +1,31 @@
 import json
-import pandas as pd
+import mmap
+import os
+import tempfile
+import xlsxwriter
 from typing import List, Dict
+from excel_generator import write_sheet
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to stdlib json
+    orjson = None
+
+def _load_json_file(path: str):
+    """Parses a JSON file; with orjson, straight from a read-only mmap (no read() copy)."""
+    with open(path, 'rb') as f:
+        # Empty files can't be mapped; let the parser report them
+        if orjson is None or os.fstat(f.fileno()).st_size == 0:
+            return json.loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
+
+# Fields compared against the internal DB (case insensitive for strings)
+FIELDS_TO_CHECK = ["first_name", "last_name", "dob", "document_type"]
 
 class KYCVerifier:
     def __init__(self, db_path: str = "customer_db.json"):
-        with open(db_path, 'r') as f:
-            self.db = json.load(f)
+        self.db = _load_json_file(db_path)
         # Index DB by ID Number for easy lookup (in real world, maybe fuzzy match on name too)
         self.db_index = {record['id_number']: record for record in self.db}
 
@@ -31,9 +51,7 @@ class KYCVerifier:
         discrepancies = []
         
         # Compare Fields (Case insensitive for strings)
-        fields_to_check = ["first_name", "last_name", "dob", "document_type"]
-        
-        for field in fields_to_check:
+        for field in FIELDS_TO_CHECK:
             extracted_val = str(extracted_data.get(field, "")).upper().strip()
             db_val = str(record.get(field, "")).upper().strip()
             
@@ -55,6 +73,63 @@ class KYCVerifier:
                 "details": "All fields match"
             }
 
+# Leading report columns; Doc_* columns for extracted fields follow
+REPORT_COLUMNS = ["Status", "Reason/Discrepancies", "Customer ID"]
+
+def _report_row(r: Dict) -> Dict:
+    """Flattens one verification report into a spreadsheet row."""
+    row = {
+        "Status": r.get("status"),
+        "Reason/Discrepancies": r.get("reason") or r.get("discrepancies"),
+        "Customer ID": r.get("customer_id", "N/A"),
+    }
+    # Add extracted data details if available
+    if "extracted" in r:
+        for k, v in r["extracted"].items():
+            row[f"Doc_{k}"] = v
+    return row
+
+class KYCReportWriter:
+    """
+    Writes the KYC report one result at a time, as results complete.
+
+    Rows are flattened and spilled to a temporary JSON-lines file on
+    append(), so no report is held in memory; close() streams them into the
+    workbook once every Doc_* column is known (the header row goes first).
+    """
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.count = 0
+        # Columns in first-seen order
+        self._columns = dict.fromkeys(REPORT_COLUMNS)
+        self._spill = tempfile.TemporaryFile("w+", encoding="utf-8", dir=os.path.dirname(output_path) or None)
+
+    def append(self, report: Dict):
+        row = _report_row(report)
+        self._columns.update(dict.fromkeys(row))
+        self._spill.write(json.dumps(row, default=str) + "\n")
+        self.count += 1
+
+    def _rows(self):
+        self._spill.seek(0)
+        for line in self._spill:
+            yield json.loads(line)
+
+    def close(self):
+        try:
+            if not self.count:
+                print("No reports to generate.")
+                return
+            workbook = xlsxwriter.Workbook(self.output_path, {"constant_memory": True})
+            try:
+                write_sheet(workbook, "Sheet1", list(self._columns), self._rows())
+            finally:
+                workbook.close()
+        finally:
+            self._spill.close()
+        print(f"KYC Report generated at {self.output_path}")
+
 def generate_kyc_report(reports: List[Dict], output_path: str):
     """
     Generates an Excel report for KYC verification.
@@ -63,21 +138,15 @@ def generate_kyc_report(reports: List[Dict], output_path: str):
         print("No reports to generate.")
         return
 
-    # Flatten for Excel
-    rows = []
+    # Columns in first-seen order, known before streaming the rows out
+    columns = dict.fromkeys(REPORT_COLUMNS)
     for r in reports:
-        row = {
-            "Status": r.get("status"),
-            "Reason/Discrepancies": r.get("reason") or r.get("discrepancies"),
-            "Customer ID": r.get("customer_id", "N/A"),
-        }
-        # Add extracted data details if available
         if "extracted" in r:
-            for k, v in r["extracted"].items():
-                row[f"Doc_{k}"] = v
-        
-        rows.append(row)
+            columns.update((f"Doc_{k}", None) for k in r["extracted"])
 
-    df = pd.DataFrame(rows)
-    df.to_excel(output_path, index=False)
+    workbook = xlsxwriter.Workbook(output_path, {"constant_memory": True})
+    try:
+        write_sheet(workbook, "Sheet1", list(columns), (_report_row(r) for r in reports))
+    finally:
+        workbook.close()
     print(f"KYC Report generated at {output_path}")
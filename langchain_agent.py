@@ -1,20 +1,374 @@
 import os
 import json
+import time
+import io
 import base64
-from typing import Dict, Optional
+import mimetypes
+import hashlib
+import asyncio
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import httpx
+import openai
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.exceptions import OutputParserException
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.prompts import ChatPromptTemplate
+
+# Flexible extraction task - captures EVERYTHING
+_EXTRACTION_TASK = """You are an expert document data extractor.
+
+TASK: Extract ALL information from this identity document (Passport, License, ID Card, etc.).
+
+IMPORTANT: Extract EVERY field you can see, not just common ones. Be comprehensive.
+
+Common fields to look for (but not limited to):
+- Personal: first_name, middle_name, last_name, full_name, maiden_name
+- Dates: dob (date of birth), issue_date, expiry_date
+- Identity: id_number, passport_number, license_number, national_id
+- Document: document_type, document_number, issuing_authority, country_code
+- Physical: sex/gender, height, weight, eye_color, hair_color, blood_type
+- Address: address, city, state, postal_code, country
+- Other: nationality, place_of_birth, signature_present, photo_present, mrz_code
+
+Return ALL fields you find as JSON. Use snake_case for field names.
+If a field is not present, omit it (don't include null values).
+Format dates as YYYY-MM-DD."""
+
+EXTRACTION_PROMPT = _EXTRACTION_TASK + """
+
+Example output structure (extract what you actually see):
+{
+    "document_type": "PASSPORT",
+    "first_name": "JOHN",
+    "last_name": "DOE",
+    "dob": "1990-01-01",
+    "passport_number": "A12345678",
+    "nationality": "USA",
+    "sex": "M",
+    "place_of_birth": "New York",
+    "issue_date": "2020-01-01",
+    "expiry_date": "2030-01-01",
+    "issuing_authority": "U.S. Department of State",
+    "confidence": 0.97
+}
+
+Also include "confidence" (0.0-1.0): how sure you are that every value is read correctly.
+Return ONLY valid JSON. No markdown, no explanations."""
+
+REVIEW_PROMPT = """You are a REVIEWER AGENT performing quality control.
+
+Another AI extracted this data from a KYC document:
+{extracted_data}
+
+Review the document and verify accuracy. Return JSON:
+{{
+    "review_status": "APPROVED" or "NEEDS_CORRECTION",
+    "confidence_score": 0.0-1.0,
+    "corrections": {{"field_name": "corrected_value"}},
+    "issues_found": ["issue1"],
+    "reviewer_notes": "notes"
+}}"""
+
+# Bump when prompts or response handling change, so cached replies are not reused
+PROMPT_VERSION = "v2"
+
+# Cached replies hold customer PII: they are readable by the owner only and
+# ignored (then deleted) once older than this many seconds
+CACHE_MAX_AGE = 24 * 60 * 60
+
+# Largest file Gemini takes inline (base64 in the request); bigger ones are uploaded
+GEMINI_INLINE_LIMIT = 15 * 1024 * 1024
+
+# LLM calls are retried here (not inside the SDKs, so every attempt goes back
+# through the rate limiter) with jittered exponential backoff
+MAX_ATTEMPTS = 4
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+_RETRY_POLICY = dict(
+    stop=stop_after_attempt(MAX_ATTEMPTS),
+    wait=wait_exponential_jitter(initial=1, max=10),
+    reraise=True,
+)
+
+# Follow-up sent (with the model's bad reply) when a reply isn't valid JSON
+JSON_REPAIR_PROMPT = "Your previous reply was not valid JSON. Return ONLY the JSON requested above, with no other text."
+
+def _is_transient(error: BaseException) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying."""
+    if isinstance(error, (TimeoutError, httpx.TimeoutException, httpx.TransportError, openai.APIConnectionError)):
+        return True
+    # openai errors carry status_code, google-genai errors carry code
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return status in RETRY_STATUS_CODES
+
+def _repair_messages(message: HumanMessage, error: OutputParserException) -> List:
+    """The original request, the unparseable reply, and a stricter follow-up."""
+    return [message, AIMessage(content=error.llm_output or ""), HumanMessage(content=JSON_REPAIR_PROMPT)]
+
+# Extractions at or above this self-reported confidence skip the review call
+# (override with the REVIEW_THRESHOLD environment variable)
+DEFAULT_REVIEW_THRESHOLD = 0.9
+
+def _review_threshold() -> float:
+    return float(os.getenv("REVIEW_THRESHOLD", DEFAULT_REVIEW_THRESHOLD))
+
+def _pop_confidence(extracted_data: Dict) -> Tuple[Dict, Optional[float]]:
+    """
+    Split the extraction's self-reported confidence from its fields. It only
+    drives the skip decision (a skipped review reports it as confidence_score)
+    and never reaches final_data or the report.
+    """
+    data = dict(extracted_data)
+    confidence = data.pop("confidence", None)
+    try:
+        return data, float(confidence)
+    except (TypeError, ValueError):
+        return data, None
+
+def _skipped_review(extracted_data: Dict, confidence: Optional[float], threshold: float) -> Optional[Dict]:
+    """Review result for a confident extraction (None if it still needs reviewing)."""
+    if confidence is None or confidence < threshold:
+        return None
+    return {
+        "final_data": extracted_data,
+        "review_result": {
+            "review_status": "SKIPPED",
+            "confidence_score": confidence,
+            "reviewer_notes": f"Extraction confidence {confidence} >= review threshold {threshold}"
+        },
+        "was_corrected": False
+    }
+
+# Aliases for common field-name variations -> canonical schema field. When
+# several aliases of one field are present, the earliest listed wins.
+FIELD_ALIASES = {
+    'passport_number': 'id_number',
+    'license_number': 'id_number',
+    'national_id': 'id_number',
+    'document_number': 'id_number',
+    'given_name': 'first_name',
+    'given_names': 'first_name',
+    'surname': 'last_name',
+    'family_name': 'last_name',
+    'date_of_birth': 'dob',
+    'birth_date': 'dob',
+}
+_ALIAS_RANK = {alias: rank for rank, alias in enumerate(FIELD_ALIASES)}
+
+# Default (max in-flight requests, requests per minute) for each provider's tier
+PROVIDER_LIMITS = {
+    "gemini": (32, 1000),
+    "openai": (16, 500),
+}
+
+# MIME types for the document formats we accept, without a mimetypes lookup per call
+_EXT_MIME = {
+    '.pdf': 'application/pdf',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+}
+
+def _mime_type(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    mime_type = _EXT_MIME.get(ext)
+    if mime_type is None:
+        mime_type = mimetypes.guess_type(path)[0] or 'image/jpeg'
+    return mime_type
+
+def _file_key(path: str):
+    """(path, mtime, size): memo key that changes whenever the file does."""
+    st = os.stat(path)
+    return path, st.st_mtime_ns, st.st_size
+
+# Read size for base64; a multiple of 3 so no chunk gets '=' padding mid-stream
+_B64_CHUNK = 57 * 1024
+
+# Vision models tile/resize internally; larger images only cost upload and tokens
+MAX_IMAGE_EDGE = 1536
+JPEG_QUALITY = 85
+
+def _downscaled_jpeg(path: str) -> Optional[bytes]:
+    """JPEG bytes with the long edge cut to MAX_IMAGE_EDGE, or None if already small enough."""
+    try:
+        with Image.open(path) as image:
+            if max(image.size) <= MAX_IMAGE_EDGE:
+                return None
+            image.thumbnail((MAX_IMAGE_EDGE, MAX_IMAGE_EDGE), Image.LANCZOS)
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=JPEG_QUALITY)
+            return buffer.getvalue()
+    except OSError:
+        # Not something PIL can read; send it as-is
+        return None
+
+def _encode_payload(path: str) -> Tuple[str, str]:
+    """(mime type, base64) for a document; large images are downscaled to JPEG first."""
+    mime_type = _mime_type(path)
+    if mime_type.startswith("image/"):
+        downscaled = _downscaled_jpeg(path)
+        if downscaled is not None:
+            return "image/jpeg", base64.b64encode(downscaled).decode('ascii')
+    
+    # Encode chunk by chunk so the raw file is never held alongside its encoding
+    encoded = bytearray()
+    with open(path, "rb") as image_file:
+        while chunk := image_file.read(_B64_CHUNK):
+            encoded += base64.b64encode(chunk)
+    return mime_type, encoded.decode('ascii')
+
+# Total base64 kept for re-sends of the same document (review, retries)
+PAYLOAD_CACHE_BYTES = 64 * 1024 * 1024
+
+class _PayloadCache:
+    """
+    LRU of encoded document payloads, bounded by their total size.
+    
+    One entry per path, tagged with the file's (mtime_ns, size): a file
+    changed in place is re-encoded and replaces its old entry.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._entries: "OrderedDict[str, Tuple[int, int, Tuple[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, path: str, mtime_ns: int, size: int) -> Tuple[str, str]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == (mtime_ns, size):
+                self._entries.move_to_end(path)
+                return entry[2]
+        
+        payload = _encode_payload(path)
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._bytes -= len(old[2][1])
+            # A payload bigger than the whole budget is not kept
+            if len(payload[1]) <= self._max_bytes:
+                self._entries[path] = (mtime_ns, size, payload)
+                self._bytes += len(payload[1])
+                while self._bytes > self._max_bytes:
+                    _, (_, _, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted[1])
+        return payload
+
+_payload_cache = _PayloadCache(PAYLOAD_CACHE_BYTES)
+
+@lru_cache(maxsize=1024)
+def _image_sha256(path: str, mtime_ns: int, size: int) -> str:
+    image_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            image_hash.update(chunk)
+    return image_hash.hexdigest()
+
+class _RateLimiter:
+    """
+    Async token bucket: refills at qpm/60 tokens per second and holds at most
+    `burst` tokens, so bursts are smoothed instead of tripping 429s.
+    """
+    
+    def __init__(self, qpm: float, burst: int):
+        self.rate = qpm / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            # Wait for the next token; callers queue behind the lock in order
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+
+_SELF_REVIEW_TASK = """Then act as a REVIEWER performing quality control on your own extraction:
+1. Look at the document image again
+2. Verify every extracted value is ACCURATE
+3. Identify any MISTAKES or MISSING fields
+4. Put CORRECTIONS in "review", leaving "data" as first extracted"""
+
+_FUSED_RESULT_SHAPE = """{
+    "data": {"document_type": "PASSPORT", "first_name": "JOHN", "...": "every field you found"},
+    "review": {
+        "review_status": "APPROVED" or "NEEDS_CORRECTION",
+        "confidence_score": 0.0-1.0,
+        "corrections": {"field_name": "corrected_value"},
+        "issues_found": ["issue1"],
+        "reviewer_notes": "notes"
+    }
+}"""
+
+_FUSED_RESULT_RULES = """If everything is correct, return APPROVED with empty corrections.
+Return ONLY valid JSON. No markdown, no explanations."""
+
+# Extraction and self-review in one request (one image upload, one round-trip)
+EXTRACT_AND_REVIEW_PROMPT = f"""{_EXTRACTION_TASK}
+
+{_SELF_REVIEW_TASK}
+
+Return JSON with this structure:
+{_FUSED_RESULT_SHAPE}
+
+{_FUSED_RESULT_RULES}"""
+
+# OpenAI JSON mode: replies are always a single JSON object
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+# Offline runs: OpenAI Batch API jobs finish within this window at ~50% of the price
+BATCH_API_WINDOW = "24h"
+BATCH_API_ENDPOINT = "/v1/chat/completions"
+
+# Documents per LLM request. Batching is opt-in: several people's documents
+# share one prompt, and each result is only accepted when it echoes its
+# document's index
+DEFAULT_BATCH_SIZE = 1
+
+def _batch_prompt(count: int) -> str:
+    """EXTRACT_AND_REVIEW_PROMPT for `count` documents, each image labelled "Document N:"."""
+    return f"""You are given {count} separate identity documents. Each image is preceded by
+its label "Document N:" (N from 1 to {count}).
+Handle EACH document on its own, exactly as described below.
+
+{_EXTRACTION_TASK}
+
+{_SELF_REVIEW_TASK}
+
+Return a JSON object {{"results": [...]}} whose "results" array holds exactly
+{count} objects, one per document. Each object has "document_index" set to
+that document's N, plus this structure:
+{_FUSED_RESULT_SHAPE}
+
+{_FUSED_RESULT_RULES}"""
 
 class LangChainKYCAgent:
     """
     LangChain-powered KYC extraction agent with structured output.
     """
     
-    def __init__(self, provider: str = "gemini"):
+    def __init__(self, provider: str = "gemini", max_concurrent: Optional[int] = None, qpm: Optional[float] = None,
+                 cache_dir: Optional[str] = "kyc_cache", batch_size: int = DEFAULT_BATCH_SIZE):
         self.provider = provider.lower()
+        self.batch_size = max(1, batch_size)
+        self.review_threshold = _review_threshold()
+        # Parsed LLM replies keyed by document content + prompt (None disables)
+        self.cache_dir = cache_dir
         
         if self.provider == "gemini":
             api_key = os.getenv("GEMINI_API_KEY")
@@ -23,104 +377,155 @@ class LangChainKYCAgent:
             self.llm = ChatGoogleGenerativeAI(
                 model="gemini-2.0-flash",
                 google_api_key=api_key,
-                temperature=0  # Deterministic for data extraction
+                temperature=0,  # Deterministic for data extraction
+                response_mime_type="application/json",  # JSON mode: no fences or prose
+                max_retries=0  # retried by _invoke/_ainvoke instead
             )
+            # The model holds one google-genai client for its lifetime, so every
+            # call already reuses its keep-alive connection pool
             
         elif self.provider == "openai":
             api_key = os.getenv("OPENAI_API_KEY")
             if not api_key:
                 raise ValueError("OPENAI_API_KEY not found.")
+            # One keep-alive pool per client, sized to the concurrency cap, so
+            # TCP/TLS setup is paid once per connection rather than per request
+            pool_size = max_concurrent or PROVIDER_LIMITS["openai"][0]
+            limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
             self.llm = ChatOpenAI(
                 model="gpt-4o-mini",
                 api_key=api_key,
-                temperature=0
+                temperature=0,
+                model_kwargs={"response_format": JSON_RESPONSE_FORMAT},
+                max_retries=0,  # retried by _invoke/_ainvoke instead
+                http_client=httpx.Client(limits=limits),
+                http_async_client=httpx.AsyncClient(limits=limits)
             )
         else:
             raise ValueError("Invalid provider. Choose 'gemini' or 'openai'.")
         
+        # Cap in-flight async LLM calls and their rate to the provider's limits
+        default_concurrent, default_qpm = PROVIDER_LIMITS[self.provider]
+        self.max_concurrent = max_concurrent or default_concurrent
+        self.qpm = qpm or default_qpm
+        self._sem = asyncio.Semaphore(self.max_concurrent)
+        self._limiter = _RateLimiter(self.qpm, burst=self.max_concurrent)
+        
         # JSON output parser
         self.parser = JsonOutputParser()
         
-        # Extraction prompt template
-        self.extraction_prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert KYC document extractor. 
-Extract the following information from the ID document (Passport, Driving License, etc.):
-- first_name
-- last_name
-- dob (YYYY-MM-DD format)
-- id_number
-- document_type (e.g., PASSPORT, DRIVING_LICENSE, ID_CARD)
-- expiry_date (YYYY-MM-DD format, if available)
-
-Return ONLY valid JSON. No markdown, no explanations.
-{format_instructions}"""),
-            ("human", "{input}")
-        ])
-        
-        # Review prompt template
-        self.review_prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a REVIEWER AGENT performing quality control.
-
-Another AI extracted this data from a KYC document:
-{extracted_data}
-
-Your job:
-1. Review the document image again
-2. Verify if the extracted data is ACCURATE
-3. Identify any MISTAKES or MISSING fields
-4. Provide CORRECTIONS if needed
-
-Return ONLY valid JSON with this structure:
-{{
-    "review_status": "APPROVED" or "NEEDS_CORRECTION",
-    "confidence_score": 0.0-1.0,
-    "corrections": {{"field_name": "corrected_value"}},
-    "issues_found": ["issue1", "issue2"],
-    "reviewer_notes": "any observations"
-}}
-
-If everything is correct, return APPROVED with empty corrections.
-{format_instructions}"""),
-            ("human", "{input}")
-        ])
-    
-    def _encode_image(self, image_path: str) -> str:
-        """Encode image to base64 for OpenAI."""
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
-    
-    def _prepare_image_message(self, file_path: str, text: str) -> HumanMessage:
-        """Prepare message with image for LLM."""
-        import mimetypes
-        mime_type, _ = mimetypes.guess_type(file_path)
-        if not mime_type:
-            if file_path.lower().endswith('.pdf'):
-                mime_type = 'application/pdf'
-            elif file_path.lower().endswith(('.png', '.jpg', '.jpeg')):
-                mime_type = 'image/jpeg'
+        # Compiled once: messages -> LLM -> parsed JSON. Every prompt here is a
+        # prebuilt vision message, so one chain serves extract, review and batches
+        self.json_chain = self.llm | self.parser
+    
+    def _encode_image(self, image_path: str) -> Tuple[str, str]:
+        """(mime type, base64) for the document (memoized until the file changes)."""
+        return _payload_cache.get(*_file_key(image_path))
+    
+    def _image_part(self, file_path: str) -> Dict:
+        """
+        Message content part carrying the document as an inline base64 image.
+        Inline data saves Gemini's separate upload round-trip; only documents
+        still over its inline limit after downscaling are uploaded first.
+        """
+        mime_type, base64_image = self._encode_image(file_path)
         
-        if self.provider == "gemini":
-            # Gemini accepts file paths directly
+        if self.provider == "gemini" and len(base64_image) * 3 // 4 > GEMINI_INLINE_LIMIT:
             import google.generativeai as genai
-            uploaded_file = genai.upload_file(file_path, mime_type=mime_type)
-            return HumanMessage(
-                content=[
-                    {"type": "text", "text": text},
-                    {"type": "image_url", "image_url": uploaded_file.uri}
-                ]
-            )
-        else:
-            # OpenAI needs base64
-            base64_image = self._encode_image(file_path)
-            return HumanMessage(
-                content=[
-                    {"type": "text", "text": text},
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:{mime_type};base64,{base64_image}"}
-                    }
-                ]
-            )
+            uploaded_file = genai.upload_file(file_path, mime_type=_mime_type(file_path))
+            return {"type": "image_url", "image_url": uploaded_file.uri}
+        
+        return {
+            "type": "image_url",
+            "image_url": {"url": f"data:{mime_type};base64,{base64_image}"}
+        }
+    
+    def _build_vision_message(self, file_path: str, text: str) -> HumanMessage:
+        """The one message builder: prompt text plus the document image."""
+        return HumanMessage(content=[{"type": "text", "text": text}, self._image_part(file_path)])
+    
+    def _invoke(self, message: HumanMessage):
+        """
+        json_chain.invoke, retried with backoff on transient errors; a reply
+        that isn't valid JSON gets one stricter re-prompt before giving up.
+        """
+        for attempt in Retrying(retry=retry_if_exception(_is_transient), **_RETRY_POLICY):
+            with attempt:
+                try:
+                    return self.json_chain.invoke([message])
+                except OutputParserException as e:
+                    return self.json_chain.invoke(_repair_messages(message, e))
+    
+    async def _throttled(self, messages: List):
+        """json_chain.ainvoke, throttled by the concurrency cap and rate limiter."""
+        async with self._sem:
+            await self._limiter.acquire()
+            return await self.json_chain.ainvoke(messages)
+    
+    async def _ainvoke(self, message: HumanMessage):
+        """Async _invoke; every attempt is throttled."""
+        async for attempt in AsyncRetrying(retry=retry_if_exception(_is_transient), **_RETRY_POLICY):
+            with attempt:
+                try:
+                    return await self._throttled([message])
+                except OutputParserException as e:
+                    return await self._throttled(_repair_messages(message, e))
+    
+    def _cache_path(self, file_path: str, text: str) -> Optional[str]:
+        """Cache file for this document's bytes, provider and prompt text."""
+        if not self.cache_dir:
+            return None
+        image_hash = _image_sha256(*_file_key(file_path))
+        prompt_hash = hashlib.sha256(f"{self.provider}\n{text}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{image_hash}_{prompt_hash}_{PROMPT_VERSION}.json")
+    
+    def _cache_get(self, cache_path: Optional[str]) -> Optional[Dict]:
+        if not cache_path:
+            return None
+        try:
+            if time.time() - os.path.getmtime(cache_path) > CACHE_MAX_AGE:
+                os.remove(cache_path)
+                return None
+            with open(cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _cache_put(self, cache_path: Optional[str], reply: Dict):
+        if not cache_path:
+            return
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            # Write-then-rename so a concurrent reader never sees a partial file
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            fd = os.open(tmp_path, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(reply, f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+    
+    def _invoke_json(self, file_path: str, text: str) -> Dict:
+        """Send text + document image and return the parsed JSON reply (cached)."""
+        cache_path = self._cache_path(file_path, text)
+        reply = self._cache_get(cache_path)
+        if reply is None:
+            reply = self._invoke(self._build_vision_message(file_path, text))
+            self._cache_put(cache_path, reply)
+        return reply
+    
+    async def _ainvoke_json(self, file_path: str, text: str) -> Dict:
+        """Async _invoke_json; cache hits skip the rate limiter entirely."""
+        cache_path = self._cache_path(file_path, text)
+        reply = self._cache_get(cache_path)
+        if reply is None:
+            reply = await self._ainvoke(self._build_vision_message(file_path, text))
+            self._cache_put(cache_path, reply)
+        return reply
+    
+    def _parse_json_text(self, text: str) -> Dict:
+        """Parse a raw JSON reply (Batch API output), tolerating a ```json fence."""
+        return self.parser.parse(text)
     
     def extract_data(self, file_path: str) -> Optional[Dict]:
         """
@@ -128,80 +533,16 @@ If everything is correct, return APPROVED with empty corrections.
         Uses flexible extraction to capture any fields present.
         """
         try:
-            # Flexible extraction prompt - captures EVERYTHING
-            prompt_text = """You are an expert document data extractor.
-
-TASK: Extract ALL information from this identity document (Passport, License, ID Card, etc.).
-
-IMPORTANT: Extract EVERY field you can see, not just common ones. Be comprehensive.
-
-Common fields to look for (but not limited to):
-- Personal: first_name, middle_name, last_name, full_name, maiden_name
-- Dates: dob (date of birth), issue_date, expiry_date
-- Identity: id_number, passport_number, license_number, national_id
-- Document: document_type, document_number, issuing_authority, country_code
-- Physical: sex/gender, height, weight, eye_color, hair_color, blood_type
-- Address: address, city, state, postal_code, country
-- Other: nationality, place_of_birth, signature_present, photo_present, mrz_code
-
-Return ALL fields you find as JSON. Use snake_case for field names.
-If a field is not present, omit it (don't include null values).
-Format dates as YYYY-MM-DD.
-
-Example output structure (extract what you actually see):
-{
-    "document_type": "PASSPORT",
-    "first_name": "JOHN",
-    "last_name": "DOE",
-    "dob": "1990-01-01",
-    "passport_number": "A12345678",
-    "nationality": "USA",
-    "sex": "M",
-    "place_of_birth": "New York",
-    "issue_date": "2020-01-01",
-    "expiry_date": "2030-01-01",
-    "issuing_authority": "U.S. Department of State"
-}
-
-Return ONLY valid JSON. No markdown, no explanations."""
-            
-            # Encode image to base64
-            base64_image = self._encode_image(file_path)
-            
-            # Get mime type
-            import mimetypes
-            mime_type, _ = mimetypes.guess_type(file_path)
-            if not mime_type:
-                mime_type = 'image/jpeg'
-            
-            # Create message with image
-            message = HumanMessage(
-                content=[
-                    {"type": "text", "text": prompt_text},
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:{mime_type};base64,{base64_image}"}
-                    }
-                ]
-            )
-            
-            # Invoke LLM
-            response = self.llm.invoke([message])
-            
-            # Parse response
-            text = response.content.strip()
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.endswith("```"):
-                text = text[:-3]
-            
-            extracted = json.loads(text.strip())
-            
             # Normalize field names for consistency
-            normalized = self._normalize_fields(extracted)
-            
-            return normalized
-            
+            return self._normalize_fields(self._invoke_json(file_path, EXTRACTION_PROMPT))
+        except Exception as e:
+            print(f"LangChain extraction error: {e}")
+            return None
+    
+    async def aextract_data(self, file_path: str) -> Optional[Dict]:
+        """Async extract_data; lets several documents wait on the LLM at once."""
+        try:
+            return self._normalize_fields(await self._ainvoke_json(file_path, EXTRACTION_PROMPT))
         except Exception as e:
             print(f"LangChain extraction error: {e}")
             return None
@@ -210,103 +551,296 @@ Return ONLY valid JSON. No markdown, no explanations."""
         """
         Normalize field names for consistency across different document types.
         """
-        # Create aliases for common variations
-        field_aliases = {
-            'passport_number': 'id_number',
-            'license_number': 'id_number',
-            'national_id': 'id_number',
-            'document_number': 'id_number',
-            'given_name': 'first_name',
-            'given_names': 'first_name',
-            'surname': 'last_name',
-            'family_name': 'last_name',
-            'date_of_birth': 'dob',
-            'birth_date': 'dob',
-        }
-        
         normalized = data.copy()
         
-        # Apply aliases (keep original + add normalized version)
-        for original_key, normalized_key in field_aliases.items():
-            if original_key in normalized and normalized_key not in normalized:
-                normalized[normalized_key] = normalized[original_key]
+        # Apply aliases (keep original + add normalized version); only aliases
+        # present in this document are visited, in FIELD_ALIASES priority order
+        for original_key in sorted(data.keys() & FIELD_ALIASES.keys(), key=_ALIAS_RANK.__getitem__):
+            normalized.setdefault(FIELD_ALIASES[original_key], data[original_key])
         
         return normalized
     
+    def _review_text(self, extracted_data: Dict) -> str:
+        return REVIEW_PROMPT.format(extracted_data=json.dumps(extracted_data, indent=2))
+    
+    def _apply_review(self, extracted_data: Dict, review_result: Dict) -> Dict:
+        """Apply the reviewer's corrections (if any) to the extracted data."""
+        if review_result.get("review_status") == "NEEDS_CORRECTION":
+            corrected_data = extracted_data.copy()
+            for field, value in review_result.get("corrections", {}).items():
+                if field in corrected_data:
+                    corrected_data[field] = value
+            
+            return {
+                "final_data": corrected_data,
+                "review_result": review_result,
+                "was_corrected": True
+            }
+        else:
+            return {
+                "final_data": extracted_data,
+                "review_result": review_result,
+                "was_corrected": False
+            }
+    
+    def _review_failed(self, extracted_data: Dict, error: Exception) -> Dict:
+        print(f"LangChain review error: {error}")
+        return {
+            "final_data": extracted_data,
+            "review_result": {"review_status": "ERROR", "error": str(error)},
+            "was_corrected": False
+        }
+    
     def review_extraction(self, file_path: str, extracted_data: Dict) -> Dict:
         """
-        Review extraction using LangChain.
+        Review extraction using LangChain (skipped, without an LLM call, when
+        the extraction's own confidence meets review_threshold).
         """
+        extracted_data, confidence = _pop_confidence(extracted_data)
+        skipped = _skipped_review(extracted_data, confidence, self.review_threshold)
+        if skipped:
+            return skipped
         try:
-            review_text = f"""You are a REVIEWER AGENT performing quality control.
-
-Another AI extracted this data from a KYC document:
-{json.dumps(extracted_data, indent=2)}
-
-Review the document and verify accuracy. Return JSON:
-{{
-    "review_status": "APPROVED" or "NEEDS_CORRECTION",
-    "confidence_score": 0.0-1.0,
-    "corrections": {{"field_name": "corrected_value"}},
-    "issues_found": ["issue1"],
-    "reviewer_notes": "notes"
-}}"""
-            
-            # Encode image
-            base64_image = self._encode_image(file_path)
-            
-            # Get mime type
-            import mimetypes
-            mime_type, _ = mimetypes.guess_type(file_path)
-            if not mime_type:
-                mime_type = 'image/jpeg'
-            
-            # Create message
-            message = HumanMessage(
-                content=[
-                    {"type": "text", "text": review_text},
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:{mime_type};base64,{base64_image}"}
-                    }
-                ]
+            review_result = self._invoke_json(file_path, self._review_text(extracted_data))
+            return self._apply_review(extracted_data, review_result)
+        except Exception as e:
+            return self._review_failed(extracted_data, e)
+    
+    async def areview_extraction(self, file_path: str, extracted_data: Dict) -> Dict:
+        """Async review_extraction."""
+        extracted_data, confidence = _pop_confidence(extracted_data)
+        skipped = _skipped_review(extracted_data, confidence, self.review_threshold)
+        if skipped:
+            return skipped
+        try:
+            review_result = await self._ainvoke_json(file_path, self._review_text(extracted_data))
+            return self._apply_review(extracted_data, review_result)
+        except Exception as e:
+            return self._review_failed(extracted_data, e)
+    
+    def _split_fused(self, file_path: str, fused: Dict) -> Optional[Dict]:
+        """Turn a {data, review} reply into extract + review results."""
+        extracted = fused.get("data") if isinstance(fused, dict) else None
+        if not extracted:
+            print(f"LangChain extraction error: no data extracted from {file_path}")
+            return None
+        extracted, _ = _pop_confidence(self._normalize_fields(extracted))
+        result = self._apply_review(extracted, fused.get("review") or {})
+        result["extracted_data"] = extracted
+        return result
+    
+    def extract_and_review(self, file_path: str) -> Optional[Dict]:
+        """
+        Extract and self-review in a single LLM call.
+        Returns review_extraction's result plus "extracted_data" (before
+        corrections), or None if nothing could be extracted.
+        """
+        try:
+            return self._split_fused(file_path, self._invoke_json(file_path, EXTRACT_AND_REVIEW_PROMPT))
+        except Exception as e:
+            print(f"LangChain extraction error: {e}")
+            return None
+    
+    async def aextract_and_review(self, file_path: str) -> Optional[Dict]:
+        """Async extract_and_review."""
+        try:
+            return self._split_fused(file_path, await self._ainvoke_json(file_path, EXTRACT_AND_REVIEW_PROMPT))
+        except Exception as e:
+            print(f"LangChain extraction error: {e}")
+            return None
+    
+    def _batch_message(self, file_paths: List[str]) -> HumanMessage:
+        content = [{"type": "text", "text": _batch_prompt(len(file_paths))}]
+        for index, file_path in enumerate(file_paths, start=1):
+            content += [{"type": "text", "text": f"Document {index}:"}, self._image_part(file_path)]
+        return HumanMessage(content=content)
+    
+    def _match_batch(self, replies, count: int) -> List[Optional[Dict]]:
+        """
+        Batch replies in document order, matched on their echoed document_index
+        (list position alone is never trusted). A document with no result, or
+        more than one, gets None; so does every document when the reply holds
+        the wrong number of results.
+        """
+        if isinstance(replies, dict):
+            replies = replies.get("results")
+        if not isinstance(replies, list):
+            raise ValueError("expected a JSON object with a results array")
+        if len(replies) != count:
+            return [None] * count
+        
+        by_index = {}
+        for reply in replies:
+            index = reply.get("document_index") if isinstance(reply, dict) else None
+            if type(index) is int and 1 <= index <= count:
+                by_index.setdefault(index, []).append(reply)
+        
+        matched = []
+        for index in range(1, count + 1):
+            found = by_index.get(index, [])
+            matched.append(
+                {key: value for key, value in found[0].items() if key != "document_index"}
+                if len(found) == 1 else None
             )
-            
-            # Invoke LLM
-            response = self.llm.invoke([message])
-            
-            # Parse response
-            text = response.content.strip()
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.endswith("```"):
-                text = text[:-3]
-            
-            review_result = json.loads(text.strip())
-            
-            # Apply corrections
-            if review_result.get("review_status") == "NEEDS_CORRECTION":
-                corrected_data = extracted_data.copy()
-                for field, value in review_result.get("corrections", {}).items():
-                    if field in corrected_data:
-                        corrected_data[field] = value
-                
-                return {
-                    "final_data": corrected_data,
-                    "review_result": review_result,
-                    "was_corrected": True
-                }
+        return matched
+    
+    def _split_cached(self, file_paths: List[str]):
+        """Results for documents already in the reply cache, plus the indexes still to send."""
+        results, pending = [None] * len(file_paths), []
+        for i, file_path in enumerate(file_paths):
+            cached = self._cache_get(self._cache_path(file_path, EXTRACT_AND_REVIEW_PROMPT))
+            if cached is None:
+                pending.append(i)
             else:
-                return {
-                    "final_data": extracted_data,
-                    "review_result": review_result,
-                    "was_corrected": False
-                }
-                
+                results[i] = self._split_fused(file_path, cached)
+        return results, [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+    
+    def _store_reply(self, file_path: str, reply: Dict) -> Optional[Dict]:
+        """Cache a matched batch reply (as if sent alone) and split it into a result."""
+        self._cache_put(self._cache_path(file_path, EXTRACT_AND_REVIEW_PROMPT), reply)
+        return self._split_fused(file_path, reply)
+    
+    def _unmatched(self, paths: List[str], replies: List[Optional[Dict]]) -> List[str]:
+        unmatched = [path for path, reply in zip(paths, replies) if reply is None]
+        if unmatched:
+            print(f"LangChain batch: {len(unmatched)} result(s) not matched to their document; retrying them one by one")
+        return unmatched
+    
+    def _run_batch(self, paths: List[str]) -> List[Optional[Dict]]:
+        if len(paths) == 1:
+            return [self.extract_and_review(paths[0])]
+        try:
+            replies = self._match_batch(self._invoke(self._batch_message(paths)), len(paths))
         except Exception as e:
-            print(f"LangChain review error: {e}")
-            return {
-                "final_data": extracted_data,
-                "review_result": {"review_status": "ERROR", "error": str(e)},
-                "was_corrected": False
-            }
+            print(f"LangChain batch extraction error: {e}")
+            replies = [None] * len(paths)
+        
+        redone = {path: self.extract_and_review(path) for path in self._unmatched(paths, replies)}
+        return [
+            self._store_reply(path, reply) if reply is not None else redone[path]
+            for path, reply in zip(paths, replies)
+        ]
+    
+    async def _arun_batch(self, paths: List[str]) -> List[Optional[Dict]]:
+        if len(paths) == 1:
+            return [await self.aextract_and_review(paths[0])]
+        try:
+            replies = self._match_batch(await self._ainvoke(self._batch_message(paths)), len(paths))
+        except Exception as e:
+            print(f"LangChain batch extraction error: {e}")
+            replies = [None] * len(paths)
+        
+        unmatched = self._unmatched(paths, replies)
+        redone = dict(zip(unmatched, await asyncio.gather(*(self.aextract_and_review(path) for path in unmatched))))
+        return [
+            self._store_reply(path, reply) if reply is not None else redone[path]
+            for path, reply in zip(paths, replies)
+        ]
+    
+    def extract_and_review_batch(self, file_paths: List[str]) -> List[Optional[Dict]]:
+        """
+        extract_and_review for many documents, packing up to batch_size
+        images into each LLM request. Results follow file_paths' order; a
+        document whose result can't be matched back to it by index is redone
+        on its own, and only matched results are cached.
+        """
+        results, batches = self._split_cached(file_paths)
+        for batch in batches:
+            for i, result in zip(batch, self._run_batch([file_paths[i] for i in batch])):
+                results[i] = result
+        return results
+    
+    async def aextract_and_review_batch(self, file_paths: List[str]) -> List[Optional[Dict]]:
+        """Async extract_and_review_batch; batches are sent concurrently."""
+        results, batches = self._split_cached(file_paths)
+        batch_results = await asyncio.gather(*(self._arun_batch([file_paths[i] for i in batch]) for batch in batches))
+        for batch, batch_result in zip(batches, batch_results):
+            for i, result in zip(batch, batch_result):
+                results[i] = result
+        return results
+    
+    def submit_batch(self, file_paths: List[str]) -> str:
+        """
+        Queue extract_and_review for every document as one OpenAI Batch API
+        job (cheaper, but asynchronous: results arrive within
+        BATCH_API_WINDOW). Returns the batch id for poll_batch; requests are
+        identified by their index in file_paths (custom_id "doc-<index>"),
+        since paths can exceed the API's custom_id limits.
+        """
+        if self.provider != "openai":
+            raise ValueError("The Batch API is only available with provider 'openai'.")
+        
+        requests = []
+        for index, file_path in enumerate(file_paths):
+            message = self._build_vision_message(file_path, EXTRACT_AND_REVIEW_PROMPT)
+            requests.append(json.dumps({
+                "custom_id": f"doc-{index}",
+                "method": "POST",
+                "url": BATCH_API_ENDPOINT,
+                "body": {
+                    "model": self.llm.model_name,
+                    "temperature": 0,
+                    "response_format": JSON_RESPONSE_FORMAT,
+                    "messages": [{"role": "user", "content": message.content}]
+                }
+            }))
+        
+        client = self.llm.root_client
+        batch_file = client.files.create(
+            file=("kyc_batch.jsonl", "\n".join(requests).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=BATCH_API_ENDPOINT,
+            completion_window=BATCH_API_WINDOW
+        )
+        return batch.id
+    
+    def poll_batch(self, batch_id: str, file_paths: List[str],
+                   poll_interval: float = 30.0) -> Dict[str, Optional[Dict]]:
+        """
+        Wait for a submit_batch job and return extract_and_review results
+        keyed by file path (None for documents that failed). `file_paths` must
+        be the list the job was submitted with.
+        """
+        client = self.llm.root_client
+        batch = client.batches.retrieve(batch_id)
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            batch = client.batches.retrieve(batch_id)
+        
+        if batch.status != "completed":
+            print(f"LangChain batch {batch_id} ended as {batch.status}")
+        
+        results = {file_path: None for file_path in file_paths}
+        if batch.error_file_id:
+            for file_path, record in self._batch_records(client, batch.error_file_id, file_paths):
+                error = record.get("error") or ((record.get("response") or {}).get("body") or {}).get("error")
+                print(f"LangChain extraction error for {file_path}: {error}")
+        if batch.output_file_id:
+            for file_path, record in self._batch_records(client, batch.output_file_id, file_paths):
+                try:
+                    body = record["response"]["body"]
+                    reply = self._parse_json_text(body["choices"][0]["message"]["content"])
+                except Exception as e:
+                    print(f"LangChain extraction error for {file_path}: {e}")
+                    continue
+                self._cache_put(self._cache_path(file_path, EXTRACT_AND_REVIEW_PROMPT), reply)
+                results[file_path] = self._split_fused(file_path, reply)
+        return results
+    
+    @staticmethod
+    def _batch_records(client, file_id: str, file_paths: List[str]):
+        """(file path, record) for each line of a Batch API result file."""
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            try:
+                index = int(record["custom_id"].removeprefix("doc-"))
+                file_path = file_paths[index]
+            except (KeyError, ValueError, IndexError):
+                print(f"LangChain batch: unknown custom_id {record.get('custom_id')!r}")
+                continue
+            yield file_path, record
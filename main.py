@@ -1,14 +1,28 @@
 import os
-import glob
 from dotenv import load_dotenv
 from agent import InvoiceAgent
-from kyc_verifier import KYCVerifier, generate_kyc_report
+from kyc_verifier import KYCVerifier, KYCReportWriter
 from audit_logger import AuditLogger
 from reviewer_agent import ReviewerAgent
 
 # Load environment variables
 load_dotenv()
 
+# Document types picked up from the input directory
+DOCUMENT_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png'}
+
+def _langchain_reviewer(provider):
+    """
+    LangChainKYCAgent to run reviews through, or None when it can't be built
+    (LangChain not installed, provider API key missing).
+    """
+    try:
+        from langchain_agent import LangChainKYCAgent
+        return LangChainKYCAgent(provider=provider)
+    except (ImportError, ValueError) as e:
+        print(f"LangChain reviewer unavailable ({e}); extractions will not be reviewed.")
+        return None
+
 def main():
     # Configuration
     INPUT_DIR = "documents"
@@ -19,28 +33,31 @@ def main():
     os.makedirs(INPUT_DIR, exist_ok=True)
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+    # Change provider to 'gemini' if you want to switch back
+    PROVIDER = "gemini"
+
     # Initialize Agent
     try:
-        # Change provider to 'gemini' if you want to switch back
-        agent = InvoiceAgent(provider="gemini")
+        agent = InvoiceAgent(provider=PROVIDER)
     except ValueError as e:
         print(f"Error: {e}")
         return
 
-    # Initialize Verifier, Audit Logger, and Reviewer Agent
+    # Initialize Verifier, Audit Logger, and Reviewer Agent (reviews run
+    # through the LangChain agent when it can be built)
     try:
         verifier = KYCVerifier()
         audit = AuditLogger()
-        reviewer = ReviewerAgent(agent)
+        reviewer = ReviewerAgent(reviewer=_langchain_reviewer(PROVIDER))
     except FileNotFoundError:
         print("Error: customer_db.json not found.")
         return
 
-    # Find all files in input directory
-    extensions = ['*.pdf', '*.jpg', '*.jpeg', '*.png', '*.PDF', '*.JPG', '*.JPEG', '*.PNG']
-    files = []
-    for ext in extensions:
-        files.extend(glob.glob(os.path.join(INPUT_DIR, ext)))
+    # Find all files in input directory (one directory pass, any extension case)
+    files = sorted(
+        entry.path for entry in os.scandir(INPUT_DIR)
+        if entry.is_file() and os.path.splitext(entry.name)[1].lower() in DOCUMENT_EXTENSIONS
+    )
     
     if not files:
         print(f"No document files found in {INPUT_DIR}. Please add some files and try again.")
@@ -48,7 +65,8 @@ def main():
 
     print(f"Found {len(files)} files to process.")
     
-    reports = []
+    # Each report goes to the writer as soon as its document is done
+    writer = KYCReportWriter(OUTPUT_FILE)
     
     for file_path in files:
         print(f"Processing {file_path}...")
@@ -99,7 +117,7 @@ def main():
                 verification_result=report
             )
             
-            reports.append(report)
+            writer.append(report)
         else:
             print("  -> Failed to extract data")
             failed_report = {"status": "FAILED", "reason": "Extraction failed", "file": os.path.basename(file_path)}
@@ -112,13 +130,10 @@ def main():
                 verification_result=failed_report
             )
             
-            reports.append(failed_report)
+            writer.append(failed_report)
 
     # Generate Report
-    if reports:
-        generate_kyc_report(reports, OUTPUT_FILE)
-    else:
-        print("No reports generated.")
+    writer.close()
     
     # Save audit trail
     audit.save_audit_report()
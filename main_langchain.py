@@ -1,14 +1,34 @@
 import os
-import glob
+import json
+import asyncio
+import argparse
 from dotenv import load_dotenv
-from langchain_agent import LangChainKYCAgent
-from kyc_verifier import KYCVerifier, generate_kyc_report
+from langchain_agent import LangChainKYCAgent, DEFAULT_BATCH_SIZE
+from kyc_verifier import KYCVerifier, KYCReportWriter
 from audit_logger import AuditLogger
 
 # Load environment variables
 load_dotenv()
 
-def main():
+# Document types picked up from the input directory
+DOCUMENT_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png'}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="LangChain KYC document verification")
+    parser.add_argument("--provider", choices=["gemini", "openai"], default="gemini")
+    parser.add_argument(
+        "--batch-api", action="store_true",
+        help="offline run: submit all documents as one OpenAI Batch API job (cheaper, results within 24h)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+        help="documents packed into one LLM request (opt-in; each result must echo its document index)"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    
     # Configuration
     INPUT_DIR = "documents"
     OUTPUT_DIR = "output"
@@ -21,7 +41,9 @@ def main():
     # Initialize LangChain Agent
     try:
         print("🔗 Initializing LangChain KYC Agent...")
-        agent = LangChainKYCAgent(provider="gemini")
+        agent = LangChainKYCAgent(provider=args.provider, batch_size=args.batch_size)
+        if args.batch_api and agent.provider != "openai":
+            raise ValueError("--batch-api requires --provider openai")
         print("✅ LangChain agent ready!")
     except ValueError as e:
         print(f"Error: {e}")
@@ -35,11 +57,11 @@ def main():
         print("Error: customer_db.json not found.")
         return
 
-    # Find all files in input directory
-    extensions = ['*.pdf', '*.jpg', '*.jpeg', '*.png', '*.PDF', '*.JPG', '*.JPEG', '*.PNG']
-    files = []
-    for ext in extensions:
-        files.extend(glob.glob(os.path.join(INPUT_DIR, ext)))
+    # Find all files in input directory (one directory pass, any extension case)
+    files = sorted(
+        entry.path for entry in os.scandir(INPUT_DIR)
+        if entry.is_file() and os.path.splitext(entry.name)[1].lower() in DOCUMENT_EXTENSIONS
+    )
     
     if not files:
         print(f"No document files found in {INPUT_DIR}. Please add some files and try again.")
@@ -47,9 +69,13 @@ def main():
 
     print(f"Found {len(files)} files to process.")
     
-    reports = []
+    # Each report goes to the writer as soon as its document is done
+    writer = KYCReportWriter(OUTPUT_FILE)
     
-    for file_path in files:
+    # Documents go to the LLM agent.batch_size per request (one unless
+    # --batch-size is given); requests are independent, so their round-trips
+    # overlap (the agent keeps in-flight requests within the provider's rate limits)
+    def receive_file(file_path):
         print(f"\n{'='*60}")
         print(f"Processing {file_path}...")
         print(f"{'='*60}")
@@ -60,12 +86,20 @@ def main():
             details=f"Processing document: {os.path.basename(file_path)}",
             document_path=file_path
         )
+    
+    async def process_batch(batch):
+        for file_path in batch:
+            receive_file(file_path)
         
-        # PRIMARY AGENT: Extract using LangChain
-        print("📄 Step 1: Extracting data with LangChain...")
-        data = agent.extract_data(file_path)
-        
-        if data:
+        # PRIMARY AGENT: Extract and self-review in a single LangChain call
+        print(f"📄 Step 1: Extracting + reviewing {len(batch)} document(s) with LangChain...")
+        results = await agent.aextract_and_review_batch(batch)
+        return [finish_file(file_path, review_result) for file_path, review_result in zip(batch, results)]
+    
+    def finish_file(file_path, review_result):
+        print(f"\n📄 {file_path}:")
+        if review_result:
+            data = review_result["extracted_data"]
             print("  ✅ Extraction Success")
             print(f"  📊 Extracted: {json.dumps(data, indent=2)}")
             
@@ -77,9 +111,8 @@ def main():
                 extracted_data=data
             )
             
-            # REVIEWER: Quality check using LangChain
+            # REVIEWER: Quality check (returned by the same call)
             print("\n🔍 Step 2: Quality review with LangChain...")
-            review_result = agent.review_extraction(file_path, data)
             final_data = review_result["final_data"]
             
             if review_result["was_corrected"]:
@@ -110,7 +143,7 @@ def main():
                 verification_result=report
             )
             
-            reports.append(report)
+            return report
         else:
             print("  ❌ Failed to extract data")
             failed_report = {"status": "FAILED", "reason": "Extraction failed", "file": os.path.basename(file_path)}
@@ -123,17 +156,32 @@ def main():
                 verification_result=failed_report
             )
             
-            reports.append(failed_report)
+            return failed_report
+    
+    async def run_all():
+        batches = [files[i:i + agent.batch_size] for i in range(0, len(files), agent.batch_size)]
+        for batch_reports in asyncio.as_completed([process_batch(batch) for batch in batches]):
+            for report in await batch_reports:
+                writer.append(report)
+    
+    if args.batch_api:
+        # Offline run: one Batch API job for every document, then wait for it
+        for file_path in files:
+            receive_file(file_path)
+        batch_id = agent.submit_batch(files)
+        print(f"\n⏳ Submitted Batch API job {batch_id}; waiting for results...")
+        results = agent.poll_batch(batch_id, files)
+        for file_path in files:
+            writer.append(finish_file(file_path, results.get(file_path)))
+    else:
+        asyncio.run(run_all())
 
     # Generate Report
     print(f"\n{'='*60}")
     print("📊 Generating final reports...")
     print(f"{'='*60}")
     
-    if reports:
-        generate_kyc_report(reports, OUTPUT_FILE)
-    else:
-        print("No reports generated.")
+    writer.close()
     
     # Save audit trail
     audit.save_audit_report()
@@ -142,5 +190,4 @@ def main():
     print(f"📄 KYC Report: {OUTPUT_FILE}")
 
 if __name__ == "__main__":
-    import json
     main()